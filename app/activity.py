@@ -0,0 +1,30 @@
+import datetime as dt
+from typing import Dict, Iterable, Optional, Tuple
+from app.metrics import registry
+
+Activity = Tuple[Optional[str], dt.datetime]
+
+class ActivityBuffer:
+    def __init__(self):
+        self._pending: Dict[int, Activity] = {}
+
+    def touch(self, tg_id: int, username: Optional[str] = None, seen_at: Optional[dt.datetime] = None) -> None:
+        prev = self._pending.get(tg_id)
+        if username is None and prev is not None:
+            username = prev[0]
+        self._pending[tg_id] = (username, seen_at or dt.datetime.utcnow())
+
+    def drain(self) -> Dict[int, Activity]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, items: Iterable[Tuple[int, Activity]]) -> None:
+        for tg_id, item in items:
+            self._pending.setdefault(tg_id, item)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+activity = ActivityBuffer()
+
+registry.callback("vpn_activity_pending", "Buffered user activity updates awaiting flush", "gauge", [], lambda: {(): len(activity)})
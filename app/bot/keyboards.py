@@ -42,11 +42,15 @@ def tariffs_menu(items: list[tuple[int, str]]) -> InlineKeyboardMarkup:
 def admin_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
+            [InlineKeyboardButton(text="📊 Статистика", callback_data="admin_stats")],
             [InlineKeyboardButton(text="📢 Рассылка", callback_data="admin_broadcast")],
             [InlineKeyboardButton(text="➕ Добавить панель", callback_data="admin_add_panel")],
             [InlineKeyboardButton(text="📋 Список панелей", callback_data="admin_list_panels")],
+            [InlineKeyboardButton(text="👥 Пользователи", callback_data="admin_users:0"), InlineKeyboardButton(text="🔎 Найти", callback_data="admin_user_search")],
+            [InlineKeyboardButton(text="🧾 Платежи", callback_data="admin_payments:0")],
             [InlineKeyboardButton(text="💼 Тарифы", callback_data="admin_tariffs")],
             [InlineKeyboardButton(text="💰 Пополнить пользователю", callback_data="admin_topup_user")],
+            [InlineKeyboardButton(text="📦 Массовые операции", callback_data="admin_bulk")],
             [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main")],
         ]
     )
@@ -56,10 +60,58 @@ def admin_tariffs_menu(items: list[tuple[int, str]]) -> InlineKeyboardMarkup:
     rows.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_open")])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
-def admin_panels_menu(items: list[tuple[int, str]]) -> InlineKeyboardMarkup:
+def pager_row(prefix: str, next_cursor: int | None, first: bool) -> list[InlineKeyboardButton]:
+    row = []
+    if not first:
+        row.append(InlineKeyboardButton(text="⏮ В начало", callback_data=f"{prefix}:0"))
+    if next_cursor:
+        row.append(InlineKeyboardButton(text="Дальше ➡️", callback_data=f"{prefix}:{next_cursor}"))
+    return row
+
+def _paged(rows: list, prefix: str, next_cursor: int | None, first: bool, back: str) -> InlineKeyboardMarkup:
+    pager = pager_row(prefix, next_cursor, first)
+    if pager:
+        rows.append(pager)
+    rows.append([InlineKeyboardButton(text="⬅️ Назад", callback_data=back)])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def admin_panels_menu(items: list[tuple[int, str]], next_cursor: int | None = None, first: bool = True) -> InlineKeyboardMarkup:
     rows = []
     for pid, title in items:
         rows.append([InlineKeyboardButton(text=title, callback_data=f"admin_panel_view:{pid}")])
         rows.append([InlineKeyboardButton(text="🗑 Удалить", callback_data=f"admin_panel_delete:{pid}")])
-    rows.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_open")])
-    return InlineKeyboardMarkup(inline_keyboard=rows)
+    return _paged(rows, "admin_list_panels", next_cursor, first, "admin_open")
+
+def admin_users_menu(items: list[tuple[int, str]], prefix: str, next_cursor: int | None, first: bool) -> InlineKeyboardMarkup:
+    rows = [[InlineKeyboardButton(text=label, callback_data=f"admin_user:{uid}")] for uid, label in items]
+    return _paged(rows, prefix, next_cursor, first, "admin_open")
+
+def admin_user_menu(user_id: int, tg_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="💰 Пополнить", callback_data=f"admin_topup_for:{tg_id}")],
+            [InlineKeyboardButton(text="🧾 Платежи", callback_data=f"admin_user_payments:{user_id}:0")],
+            [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_users:0")],
+        ]
+    )
+
+def admin_payments_menu(prefix: str, next_cursor: int | None, first: bool, back: str = "admin_open") -> InlineKeyboardMarkup:
+    return _paged([], prefix, next_cursor, first, back)
+
+def admin_bulk_menu() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="⏳ Продлить активные подписки", callback_data="admin_bulk:extend")],
+            [InlineKeyboardButton(text="💰 Начислить активным подписчикам", callback_data="admin_bulk:credit_active")],
+            [InlineKeyboardButton(text="💰 Начислить всем пользователям", callback_data="admin_bulk:credit_all")],
+            [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_open")],
+        ]
+    )
+
+def confirm_menu(callback_data: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Запустить", callback_data=callback_data)],
+            [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_flow")],
+        ]
+    )
@@ -1,10 +1,14 @@
+import time
+import asyncio
+import logging
 import hashlib
 import hmac
+import datetime as dt
 from html import escape as h
 from aiogram import Bot, Dispatcher, F
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.filters import CommandStart
+from aiogram.filters import CommandStart, Command, CommandObject
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.storage.memory import MemoryStorage
@@ -13,17 +17,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.config import settings
 from app.db import SessionLocal
-from app.models import User, User as UModel, Panel as PModel
+from app.cache import UserSnapshot, tariff_catalog, TariffItem
+from app.models import User, User as UModel, Panel as PModel, Payment
 from app.repositories.users import UserRepository, UserRepository as URepo
 from app.repositories.panels import PanelRepository
 from app.repositories.payments import PaymentRepository
 from app.repositories.subscriptions import SubscriptionRepository
 from app.repositories.tariffs import TariffRepository
-from app.services.panels import PanelService
+from app.repositories.provisioning import ProvisioningRepository
+from app.repositories.stats import StatsRepository
 from app.services.subscriptions import SubscriptionService
 from app.services.payments import CryptoBotProvider, YooKassaProvider
 from app.integrations.cryptobot import CryptoBot
 from app.integrations.yookassa import YooKassaClient
+from app.integrations.health import panel_health
 from app.bot.keyboards import (
     main_menu,
     accept_tos,
@@ -33,11 +40,29 @@ from app.bot.keyboards import (
     tariffs_menu,
     admin_tariffs_menu,
     admin_panels_menu,
+    admin_bulk_menu,
+    confirm_menu,
+    admin_users_menu,
+    admin_user_menu,
+    admin_payments_menu,
 )
-from app.bot.states import BroadcastState, AddPanelState, AdminTopupState, AdminPriceState
+from app.bot.states import BroadcastState, AddPanelState, AdminTopupState, AdminPriceState, AdminBulkState, AdminUserSearchState
+from app.bot.middlewares import UserSerializationMiddleware, MetricsMiddleware, TelegramMetricsMiddleware
+from app.watchdog import sample_profile, watchdog
+from app.warmup import warmup
+from app.jobs.bulk import extend_subscriptions, credit_balances
+
+log = logging.getLogger(__name__)
 
 bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 dp = Dispatcher(storage=MemoryStorage())
+serializer = UserSerializationMiddleware()
+BOT_COMMANDS = ("/start", "/prof")
+dp.message.outer_middleware(serializer)
+dp.callback_query.outer_middleware(serializer)
+dp.message.outer_middleware(MetricsMiddleware(commands=BOT_COMMANDS))
+dp.callback_query.outer_middleware(MetricsMiddleware())
+bot.session.middleware(TelegramMetricsMiddleware())
 
 async def ensure_channel(member_id: int) -> bool:
     try:
@@ -51,14 +76,72 @@ async def get_uc(session: AsyncSession):
     panels = PanelRepository(session)
     payments = PaymentRepository(session)
     tariffs = TariffRepository(session)
-    pservice = PanelService(panels)
-    sservice = SubscriptionService(users, SubscriptionRepository(session), pservice)
+    sservice = SubscriptionService(users, SubscriptionRepository(session), ProvisioningRepository(session))
     cb = CryptoBot(settings.CRYPTOBOT_TOKEN, settings.CRYPTOBOT_PAYEE)
     yk = YooKassaClient()
     cbp = CryptoBotProvider(payments, cb)
     ykp = YooKassaProvider(payments, yk)
     return users, sservice, panels, payments, cbp, ykp, tariffs
 
+async def tariff_items() -> list[TariffItem]:
+    items = tariff_catalog.cached()
+    if items is not None:
+        return items
+    async with SessionLocal() as s:
+        return await TariffRepository(s).catalog()
+
+def buy_tariffs_markup(items: list[TariffItem]):
+    return tariff_catalog.markup("buy", items, lambda its: tariffs_menu([(t.id, f"🛍 {t.title} • {t.price_rub} ₽") for t in its]))
+
+def admin_tariffs_markup(items: list[TariffItem]):
+    return tariff_catalog.markup("admin", items, lambda its: admin_tariffs_menu([(t.id, f"{t.title} • {t.price_rub} ₽") for t in its]))
+
+def panel_health_text(base_url: str) -> str:
+    hs = panel_health.get(base_url)
+    latency = f"{hs.latency_ms:.0f} ms" if hs.latency_ms is not None else "—"
+    text = (
+        "🩺 Состояние\n"
+        f"circuit: {hs.state}\n"
+        f"latency: {latency}\n"
+        f"errors: {hs.error_rate*100:.0f}% ({hs.errors}/{hs.requests})"
+    )
+    if hs.last_error:
+        text += f"\nlast error: {h(hs.last_error[:200])}"
+    return text
+
+def fmt_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ("Б", "КБ", "МБ", "ГБ"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ТБ"
+
+def stats_text(totals: dict, daily: dict, today: dt.date) -> str:
+    def window(metric: str, dim: str, days: int) -> int:
+        return sum(daily.get(today - dt.timedelta(days=i), {}).get((metric, dim), 0) for i in range(days))
+    def row(metric: str, dim: str = "", scale: float = 1) -> str:
+        return " / ".join(f"{window(metric, dim, n) / scale:g}" for n in (1, 7, 30))
+    text = (
+        "📊 Статистика (сегодня / 7д / 30д)\n\n"
+        f"👥 Пользователи: {totals.get(('users', ''), 0)}\n"
+        f"Новые: {row('new_users')}\n\n"
+        f"🔑 Активных подписок: {totals.get(('active_subs', ''), 0)}\n"
+        f"Активации: {row('activations')}\n"
+        f"Истекли: {row('expirations')}\n\n"
+        "💰 Выручка:"
+    )
+    dims = sorted(d for m, d in totals if m == "revenue")
+    for dim in dims:
+        provider, _, currency = dim.partition(":")
+        text += (
+            f"\n{h(provider)} {h(currency)}: {row('revenue', dim, 100)}"
+            f" • всего {totals[('revenue', dim)] / 100:g} ({totals.get(('payments', dim), 0)} платежей)"
+        )
+    if not dims:
+        text += " —"
+    return text
+
 def sign_uid(uid: str) -> str:
     return hmac.new(settings.SUBSCRIPTION_SIGN_SECRET.encode(), msg=uid.encode(), digestmod=hashlib.sha256).hexdigest()
 
@@ -78,14 +161,16 @@ async def safe_edit(message, text: str, reply_markup=None):
         else:
             raise
 
-async def show_main(user_id: int, chat_id: int, edit_message=None):
+async def user_snapshot(tg_id: int) -> UserSnapshot | None:
     async with SessionLocal() as s:
-        res = await s.execute(select(User).where(User.tg_id == user_id))
-        u = res.scalar_one_or_none()
+        return await UserRepository(s).snapshot(tg_id)
+
+async def show_main(user_id: int, chat_id: int, edit_message=None):
+    u = await user_snapshot(user_id)
     is_admin = user_id in settings.ADMIN_IDS
     kb = main_menu(is_admin=is_admin)
     text = "🏠 Главное меню"
-    if u and u.tos_accepted_at:
+    if u and u.tos_accepted:
         sub, _ = await sub_link_for_tg(user_id)
         text = f"🏠 Главное меню\n\n👤 Ваша подписка:\n<code>{h(sub)}</code>"
     if edit_message:
@@ -96,8 +181,7 @@ async def show_main(user_id: int, chat_id: int, edit_message=None):
 @dp.message(CommandStart())
 async def start(m: Message):
     async with SessionLocal() as s:
-        users, _, _, _, _, _, tariffs = await get_uc(s)
-        await tariffs.ensure_seed()
+        users, _, _, _, _, _, _ = await get_uc(s)
         u = await users.get_or_create(m.from_user.id, m.from_user.username)
         if not await ensure_channel(m.from_user.id):
             await m.answer("Для доступа подпишитесь на канал и вернитесь в бот", reply_markup=main_menu(is_admin=m.from_user.id in settings.ADMIN_IDS))
@@ -129,20 +213,26 @@ async def tos_accept(c: CallbackQuery):
 @dp.callback_query(F.data == "profile")
 async def profile(c: CallbackQuery):
     sub, dbg = await sub_link_for_tg(c.from_user.id)
+    u = await user_snapshot(c.from_user.id)
     text = (
         "👤 Профиль\n\n"
         f"🔗 Ваша постоянная ссылка-подписка:\n<code>{h(sub)}</code>\n\n"
         f"🧪 Отладка:\n<code>{h(dbg)}</code>"
     )
+    if u:
+        text += f"\n\n📊 Трафик: ↑ {fmt_bytes(u.traffic_up)} • ↓ {fmt_bytes(u.traffic_down)}"
     await safe_edit(c.message, text, reply_markup=main_menu(is_admin=c.from_user.id in settings.ADMIN_IDS))
     await c.answer()
 
 @dp.callback_query(F.data == "balance")
 async def balance(c: CallbackQuery):
     async with SessionLocal() as s:
-        users, _, _, _, _, _, _ = await get_uc(s)
-        u = await users.get_or_create(c.from_user.id, c.from_user.username)
-        await s.commit()
+        users = UserRepository(s)
+        u = await users.snapshot(c.from_user.id)
+        if u is None:
+            await users.get_or_create(c.from_user.id, c.from_user.username)
+            await s.commit()
+            u = await users.snapshot(c.from_user.id)
     await safe_edit(c.message, f"💳 Баланс: {u.balance/100:.2f} {settings.CURRENCY}", reply_markup=main_menu(is_admin=c.from_user.id in settings.ADMIN_IDS))
     await c.answer()
 
@@ -173,12 +263,9 @@ async def topup_yk(c: CallbackQuery):
 
 @dp.callback_query(F.data == "tariffs")
 async def tariffs(c: CallbackQuery):
-    async with SessionLocal() as s:
-        _, _, _, _, _, _, tariffs = await get_uc(s)
-        items_raw = await tariffs.list_active()
-        items = [(t.id, f"🛍 {t.title} • {t.price_rub} ₽") for t in items_raw]
+    items = await tariff_items()
     text = "Выберите тариф:"
-    await safe_edit(c.message, text, reply_markup=tariffs_menu(items))
+    await safe_edit(c.message, text, reply_markup=buy_tariffs_markup(items))
     await c.answer()
 
 @dp.callback_query(F.data.startswith("buy_tariff:"))
@@ -189,7 +276,7 @@ async def buy_tariff(c: CallbackQuery):
         try:
             link, expires = await subs.buy_with_balance_tariff(c.from_user.id, tid, tariffs)
             await s.commit()
-            text = f"✅ Подписка оформлена\n\n🔗 Ссылка:\n<code>{h(link)}</code>\n⏳ Действует до: {expires.date().isoformat()}"
+            text = f"✅ Подписка оформлена\n\n🔗 Ссылка:\n<code>{h(link)}</code>\n⏳ Действует до: {expires.date().isoformat()}\n\n⚙️ Ключи подключаются, пришлём уведомление, как только всё будет готово."
         except ValueError as e:
             await s.rollback()
             if str(e) == "insufficient_funds":
@@ -208,6 +295,34 @@ async def admin_open(c: CallbackQuery):
     await safe_edit(c.message, "🛠 Админ-панель", reply_markup=admin_menu())
     await c.answer()
 
+@dp.callback_query(F.data == "admin_stats")
+async def admin_stats(c: CallbackQuery):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    today = dt.datetime.utcnow().date()
+    async with SessionLocal() as s:
+        repo = StatsRepository(s)
+        totals = await repo.totals()
+        daily = await repo.daily(today - dt.timedelta(days=29))
+    await safe_edit(c.message, stats_text(totals, daily, today), reply_markup=admin_menu())
+    await c.answer()
+
+@dp.message(Command("prof"))
+async def admin_prof(m: Message, command: CommandObject):
+    if m.from_user.id not in settings.ADMIN_IDS:
+        return
+    try:
+        seconds = float(command.args or 5)
+    except ValueError:
+        seconds = 5.0
+    await m.answer(f"⏱ Профилирование {seconds:.0f} с…")
+    report = await sample_profile(seconds)
+    if watchdog.last_stall:
+        ts, stack = watchdog.last_stall
+        report += f"\n\nlast stall {dt.datetime.utcfromtimestamp(ts).isoformat(timespec='seconds')}Z:\n{stack[-1500:]}"
+    await m.answer(f"<pre>{h(report[-3900:])}</pre>")
+
 @dp.callback_query(F.data == "admin_broadcast")
 async def admin_broadcast(c: CallbackQuery, state: FSMContext):
     if c.from_user.id not in settings.ADMIN_IDS:
@@ -240,11 +355,8 @@ async def admin_tariffs(c: CallbackQuery):
     if c.from_user.id not in settings.ADMIN_IDS:
         await c.answer()
         return
-    async with SessionLocal() as s:
-        _, _, _, _, _, _, tariffs = await get_uc(s)
-        items_raw = await tariffs.list_active()
-        items = [(t.id, f"{t.title} • {t.price_rub} ₽") for t in items_raw]
-    await safe_edit(c.message, "💼 Управление тарифами:\nВыберите тариф для изменения цены.", reply_markup=admin_tariffs_menu(items))
+    items = await tariff_items()
+    await safe_edit(c.message, "💼 Управление тарифами:\nВыберите тариф для изменения цены.", reply_markup=admin_tariffs_markup(items))
     await c.answer()
 
 @dp.callback_query(F.data.startswith("admin_set_price:"))
@@ -269,10 +381,9 @@ async def admin_price_input(m: Message, state: FSMContext):
         _, _, _, _, _, _, tariffs = await get_uc(s)
         await tariffs.set_price(tid, price)
         await s.commit()
-        items_raw = await tariffs.list_active()
-        items = [(t.id, f"{t.title} • {t.price_rub} ₽") for t in items_raw]
+    items = await tariff_items()
     await state.clear()
-    await m.answer("Цена обновлена.", reply_markup=admin_tariffs_menu(items))
+    await m.answer("Цена обновлена.", reply_markup=admin_tariffs_markup(items))
 
 @dp.callback_query(F.data == "admin_add_panel")
 async def admin_add_panel(c: CallbackQuery, state: FSMContext):
@@ -322,16 +433,150 @@ async def panel_domain(m: Message, state: FSMContext):
     await state.clear()
     await m.answer("Панель добавлена", reply_markup=admin_menu())
 
-@dp.callback_query(F.data == "admin_list_panels")
+def cursor_of(data: str) -> int:
+    tail = data.rsplit(":", 1)[-1]
+    return int(tail) if tail.isdigit() else 0
+
+def split_page(items: list, size: int) -> tuple[list, bool]:
+    return items[:size], len(items) > size
+
+async def panels_page(after_id: int):
+    size = settings.ADMIN_PAGE_SIZE
+    async with SessionLocal() as s:
+        items, more = split_page(await PanelRepository(s).page(after_id, size + 1), size)
+    view = [(p.id, f"{p.id} • {p.title}") for p in items]
+    return admin_panels_menu(view, items[-1].id if more else None, first=not after_id)
+
+@dp.callback_query(F.data.startswith("admin_list_panels"))
 async def admin_list_panels(c: CallbackQuery):
     if c.from_user.id not in settings.ADMIN_IDS:
         await c.answer()
         return
+    await safe_edit(c.message, "📋 Подключенные панели:", reply_markup=await panels_page(cursor_of(c.data)))
+    await c.answer()
+
+def user_label(u: User) -> str:
+    return f"{u.tg_id} • @{u.username}" if u.username else str(u.tg_id)
+
+def payment_line(p: Payment) -> str:
+    return f"#{p.id} {p.created_at:%Y-%m-%d %H:%M} {h(p.provider)} {p.amount / 100:.2f} {h(p.currency)} {h(p.status)} (user {p.user_id})"
+
+@dp.callback_query(F.data.startswith("admin_users:"))
+async def admin_users(c: CallbackQuery):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    before_id = cursor_of(c.data)
+    size = settings.ADMIN_PAGE_SIZE
     async with SessionLocal() as s:
-        repo = PanelRepository(s)
-        items = await repo.list_all()
-        view = [(p.id, f"{p.id} • {p.title}") for p in items]
-    await safe_edit(c.message, "📋 Подключенные панели:", reply_markup=admin_panels_menu(view))
+        items, more = split_page(await UserRepository(s).page(before_id, size + 1), size)
+    kb = admin_users_menu([(u.id, user_label(u)) for u in items], "admin_users", items[-1].id if more else None, first=not before_id)
+    await safe_edit(c.message, "👥 Пользователи (новые сверху):", reply_markup=kb)
+    await c.answer()
+
+@dp.callback_query(F.data == "admin_user_search")
+async def admin_user_search(c: CallbackQuery, state: FSMContext):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    await state.set_state(AdminUserSearchState.wait_query)
+    await safe_edit(c.message, "Введите Telegram ID или начало username", reply_markup=cancel_menu())
+    await c.answer()
+
+async def user_search_page(query: str, after_id: int):
+    size = settings.ADMIN_PAGE_SIZE
+    async with SessionLocal() as s:
+        items, more = split_page(await UserRepository(s).search(query, after_id, size + 1), size)
+    text = f"🔎 «{h(query)}»: " + ("" if items else "ничего не найдено")
+    return text, admin_users_menu([(u.id, user_label(u)) for u in items], "admin_usearch", items[-1].id if more else None, first=not after_id)
+
+@dp.message(AdminUserSearchState.wait_query)
+async def admin_user_search_query(m: Message, state: FSMContext):
+    if m.from_user.id not in settings.ADMIN_IDS:
+        return
+    query = (m.text or "").strip()[:64]
+    await state.set_state(None)
+    await state.update_data(user_query=query)
+    text, kb = await user_search_page(query, 0)
+    await m.answer(text, reply_markup=kb)
+
+@dp.callback_query(F.data.startswith("admin_usearch:"))
+async def admin_user_search_page(c: CallbackQuery, state: FSMContext):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    query = (await state.get_data()).get("user_query")
+    if not query:
+        await c.answer()
+        return
+    text, kb = await user_search_page(query, cursor_of(c.data))
+    await safe_edit(c.message, text, reply_markup=kb)
+    await c.answer()
+
+@dp.callback_query(F.data.startswith("admin_user:"))
+async def admin_user_view(c: CallbackQuery):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    async with SessionLocal() as s:
+        repo = UserRepository(s)
+        u = await repo.get_by_id(cursor_of(c.data))
+        snap = await repo.snapshot(u.tg_id) if u else None
+    if not u or not snap:
+        await c.answer()
+        return
+    seen = u.last_seen_at.isoformat(timespec="minutes") if u.last_seen_at else "—"
+    sub = snap.sub_expires_at.date().isoformat() if snap.sub_expires_at else "нет"
+    text = (
+        f"👤 Пользователь #{u.id}\n\n"
+        f"Telegram ID: <code>{u.tg_id}</code>\n"
+        f"username: {'@' + h(u.username) if u.username else '—'}\n"
+        f"Баланс: {snap.balance / 100:.2f} {settings.CURRENCY}\n"
+        f"Подписка до: {sub}\n"
+        f"Активность: {seen}\n"
+        f"Регистрация: {u.created_at.date().isoformat()}"
+    )
+    await safe_edit(c.message, text, reply_markup=admin_user_menu(u.id, u.tg_id))
+    await c.answer()
+
+@dp.callback_query(F.data.startswith("admin_topup_for:"))
+async def admin_topup_for(c: CallbackQuery, state: FSMContext):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    await state.set_state(AdminTopupState.wait_amount)
+    await state.update_data(tg_id=str(cursor_of(c.data)))
+    await safe_edit(c.message, "Введите сумму в копейках/центах", reply_markup=cancel_menu())
+    await c.answer()
+
+async def payments_text(before_id: int, user_id: int | None) -> tuple[str, int | None]:
+    size = settings.ADMIN_PAGE_SIZE
+    async with SessionLocal() as s:
+        items, more = split_page(await PaymentRepository(s).page(before_id, size + 1, user_id), size)
+    title = "🧾 Платежи" + (f" пользователя #{user_id}" if user_id is not None else "")
+    lines = [payment_line(p) for p in items] or ["—"]
+    return title + "\n\n" + "\n".join(lines), items[-1].id if more else None
+
+@dp.callback_query(F.data.startswith("admin_payments:"))
+async def admin_payments(c: CallbackQuery):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    before_id = cursor_of(c.data)
+    text, nxt = await payments_text(before_id, None)
+    await safe_edit(c.message, text, reply_markup=admin_payments_menu("admin_payments", nxt, first=not before_id))
+    await c.answer()
+
+@dp.callback_query(F.data.startswith("admin_user_payments:"))
+async def admin_user_payments(c: CallbackQuery):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    user_id = int(c.data.split(":")[1])
+    before_id = cursor_of(c.data)
+    text, nxt = await payments_text(before_id, user_id)
+    kb = admin_payments_menu(f"admin_user_payments:{user_id}", nxt, first=not before_id, back=f"admin_user:{user_id}")
+    await safe_edit(c.message, text, reply_markup=kb)
     await c.answer()
 
 @dp.callback_query(F.data.startswith("admin_panel_view:"))
@@ -352,7 +597,8 @@ async def admin_panel_view(c: CallbackQuery):
         f"Название: {p.title}\n"
         f"base_url: {p.base_url}\n"
         f"domain: {p.domain}\n"
-        f"active: {bool(p.active)}"
+        f"active: {bool(p.active)}\n\n"
+        f"{panel_health_text(p.base_url)}"
     )
     await safe_edit(c.message, text, reply_markup=admin_menu())
     await c.answer()
@@ -367,9 +613,7 @@ async def admin_panel_delete(c: CallbackQuery):
         repo = PanelRepository(s)
         await repo.delete(pid)
         await s.commit()
-        items = await repo.list_all()
-        view = [(p.id, f"{p.id} • {p.title}") for p in items]
-    await safe_edit(c.message, "✅ Панель удалена.\n\n📋 Подключенные панели:", reply_markup=admin_panels_menu(view))
+    await safe_edit(c.message, "✅ Панель удалена.\n\n📋 Подключенные панели:", reply_markup=await panels_page(0))
     await c.answer()
 
 @dp.callback_query(F.data == "admin_topup_user")
@@ -399,6 +643,101 @@ async def admin_topup_user_amount(m: Message, state: FSMContext):
     await state.clear()
     await m.answer("Баланс пополнен", reply_markup=admin_menu())
 
+BULK_ACTIONS = {
+    "extend": ("⏳ Продление активных подписок", "Введите количество дней"),
+    "credit_active": ("💰 Начисление активным подписчикам", "Введите сумму в копейках/центах"),
+    "credit_all": ("💰 Начисление всем пользователям", "Введите сумму в копейках/центах"),
+}
+bulk_task: asyncio.Task | None = None
+
+async def run_bulk(message: Message, action: str, value: int) -> None:
+    title = BULK_ACTIONS[action][0]
+    last_edit = 0.0
+
+    async def progress(done: int, total: int) -> None:
+        nonlocal last_edit
+        if time.monotonic() - last_edit < 2:
+            return
+        last_edit = time.monotonic()
+        try:
+            await message.edit_text(f"{title}\n\n{done}/{total} ({done * 100 // max(total, 1)}%)")
+        except TelegramBadRequest:
+            pass
+
+    try:
+        if action == "extend":
+            report = await extend_subscriptions(value, progress)
+            text = (
+                f"✅ {title}: {report.processed} подписок продлено на {value} дн.\n"
+                f"Клиентов обновлено на панелях: {report.panel_clients}, ошибок панелей: {report.panel_errors}"
+            )
+        else:
+            report = await credit_balances(value, action == "credit_active", progress)
+            text = f"✅ {title}: {report.processed} пользователям начислено {value / 100:.2f} {settings.CURRENCY}"
+    except Exception as e:
+        log.exception("Bulk action %s failed", action)
+        text = f"❌ {title}: ошибка {h(str(e)[:200])}"
+    await message.answer(text, reply_markup=admin_menu())
+
+@dp.callback_query(F.data == "admin_bulk")
+async def admin_bulk(c: CallbackQuery):
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    await safe_edit(c.message, "📦 Массовые операции", reply_markup=admin_bulk_menu())
+    await c.answer()
+
+@dp.callback_query(F.data.startswith("admin_bulk:"))
+async def admin_bulk_choose(c: CallbackQuery, state: FSMContext):
+    action = c.data.split(":", 1)[1]
+    if c.from_user.id not in settings.ADMIN_IDS or action not in BULK_ACTIONS:
+        await c.answer()
+        return
+    await state.set_state(AdminBulkState.wait_value)
+    await state.update_data(bulk_action=action)
+    title, prompt = BULK_ACTIONS[action]
+    await safe_edit(c.message, f"{title}\n\n{prompt}", reply_markup=cancel_menu())
+    await c.answer()
+
+@dp.message(AdminBulkState.wait_value)
+async def admin_bulk_value(m: Message, state: FSMContext):
+    if m.from_user.id not in settings.ADMIN_IDS:
+        return
+    try:
+        value = int((m.text or "").strip())
+    except ValueError:
+        value = 0
+    if value <= 0:
+        await m.answer("Введите положительное целое число", reply_markup=cancel_menu())
+        return
+    action = (await state.get_data())["bulk_action"]
+    async with SessionLocal() as s:
+        if action == "extend":
+            affected = await SubscriptionRepository(s).count_active()
+        else:
+            affected = await UserRepository(s).count(action == "credit_active")
+    await state.update_data(bulk_value=value)
+    await m.answer(f"{BULK_ACTIONS[action][0]}: {value}\nЗатронет записей: {affected}", reply_markup=confirm_menu("admin_bulk_run"))
+
+@dp.callback_query(F.data == "admin_bulk_run")
+async def admin_bulk_run(c: CallbackQuery, state: FSMContext):
+    global bulk_task
+    if c.from_user.id not in settings.ADMIN_IDS:
+        await c.answer()
+        return
+    data = await state.get_data()
+    await state.clear()
+    if "bulk_value" not in data:
+        await c.answer()
+        return
+    if bulk_task is not None and not bulk_task.done():
+        await c.answer("Другая массовая операция ещё выполняется", show_alert=True)
+        return
+    action, value = data["bulk_action"], data["bulk_value"]
+    await safe_edit(c.message, f"{BULK_ACTIONS[action][0]}\n\nЗапуск…")
+    bulk_task = asyncio.create_task(run_bulk(c.message, action, value), name="bulk")
+    await c.answer()
+
 @dp.callback_query(F.data == "cancel_flow")
 async def cancel_flow(c: CallbackQuery, state: FSMContext):
     await state.clear()
@@ -410,4 +749,9 @@ async def cancel_flow(c: CallbackQuery, state: FSMContext):
     await c.answer()
 
 async def run_bot():
+    async with SessionLocal() as s:
+        await TariffRepository(s).ensure_seed()
+        await StatsRepository(s).ensure_backfill()
+        await s.commit()
+    await warmup.start()
     await dp.start_polling(bot)
@@ -0,0 +1,130 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Set, Tuple
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import CallbackQuery, Message, TelegramObject
+from app.activity import activity
+from app.config import settings
+from app.metrics import bot_handler_seconds, bot_duplicate_callbacks, telegram_errors, telegram_retry_after
+from app.profiler import profile
+from app.logging_setup import bind
+
+log = logging.getLogger(__name__)
+
+def handler_name(event: TelegramObject, commands: Iterable[str] = ()) -> str:
+    if isinstance(event, CallbackQuery):
+        return (event.data or "").split(":", 1)[0] or "callback"
+    if isinstance(event, Message):
+        text = event.text or ""
+        if text.startswith("/"):
+            command = text.split(None, 1)[0].split("@", 1)[0]
+            return command if command in commands else "unknown_command"
+        return "message"
+    return type(event).__name__
+
+class UserSerializationMiddleware(BaseMiddleware):
+    def __init__(self, window: float | None = None):
+        self.window = settings.BOT_DEDUP_WINDOW if window is None else window
+        self._locks: Dict[int, List[Any]] = {}
+        self._inflight: Set[Tuple[int, str]] = set()
+        self._recent: Dict[Tuple[int, str], float] = {}
+
+    def _duplicate(self, key: Tuple[int, str]) -> bool:
+        if key in self._inflight:
+            return True
+        last = self._recent.get(key)
+        return last is not None and time.monotonic() - last < self.window
+
+    def _done(self, key: Tuple[int, str]) -> None:
+        self._inflight.discard(key)
+        now = time.monotonic()
+        self._recent[key] = now
+        if len(self._recent) > 10_000:
+            self._recent = {k: t for k, t in self._recent.items() if now - t < self.window}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        key = None
+        if isinstance(event, CallbackQuery) and self.window > 0:
+            key = (user.id, event.data or "")
+            if self._duplicate(key):
+                bot_duplicate_callbacks.inc(handler_name(event))
+                try:
+                    await event.answer()
+                except TelegramAPIError:
+                    pass
+                return None
+            self._inflight.add(key)
+        entry = self._locks.get(user.id)
+        if entry is None:
+            entry = [asyncio.Lock(), 0]
+            self._locks[user.id] = entry
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await handler(event, data)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(user.id, None)
+            if key is not None:
+                self._done(key)
+
+class MetricsMiddleware(BaseMiddleware):
+    def __init__(self, commands: Iterable[str] = ()):
+        self.commands = frozenset(commands)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name = handler_name(event, self.commands)
+        update = data.get("event_update")
+        user = data.get("event_from_user")
+        if user is not None:
+            activity.touch(user.id, user.username)
+        with bind(update_id=getattr(update, "update_id", None), tg_id=getattr(user, "id", None), handler=name):
+            started = time.perf_counter()
+            outcome = "error"
+            with profile(f"bot:{name}") as p:
+                try:
+                    with bot_handler_seconds.track(name):
+                        result = await handler(event, data)
+                    outcome = "ok"
+                    return result
+                finally:
+                    log.log(
+                        logging.INFO if outcome == "ok" else logging.WARNING,
+                        "bot update",
+                        extra={
+                            "event": "bot_update",
+                            "outcome": outcome,
+                            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                            "queries": p.count,
+                        },
+                    )
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter:
+            telegram_retry_after.inc(name)
+            telegram_errors.inc(name, "TelegramRetryAfter")
+            raise
+        except TelegramAPIError as e:
+            telegram_errors.inc(name, type(e).__name__)
+            raise
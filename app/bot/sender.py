@@ -0,0 +1,38 @@
+import asyncio
+import time
+import logging
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+log = logging.getLogger(__name__)
+
+class RateLimitedSender:
+    def __init__(self, bot: Bot, rate: float):
+        self.bot = bot
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _wait_turn(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+    async def send(self, chat_id: int, text: str, reply_markup=None) -> bool:
+        for _ in range(3):
+            await self._wait_turn()
+            try:
+                await self.bot.send_message(chat_id, text, reply_markup=reply_markup)
+                return True
+            except TelegramRetryAfter as e:
+                async with self._lock:
+                    self._next = max(self._next, time.monotonic() + e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest):
+                return False
+            except Exception:
+                log.exception("Failed to send message to %s", chat_id)
+                return False
+        return False
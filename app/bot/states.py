@@ -16,3 +16,9 @@ class AdminTopupState(StatesGroup):
 
 class AdminPriceState(StatesGroup):
     wait_price = State()
+
+class AdminBulkState(StatesGroup):
+    wait_value = State()
+
+class AdminUserSearchState(StatesGroup):
+    wait_query = State()
@@ -0,0 +1,172 @@
+import time
+import datetime as dt
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.metrics import registry
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires, value = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    tg_id: int
+    tos_accepted: bool
+    balance: int
+    sub_expires_at: Optional[dt.datetime]
+    traffic_up: int = 0
+    traffic_down: int = 0
+
+class UserCache(TTLCache):
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._tg_by_id: Dict[int, int] = {}
+
+    def set(self, key: int, value: UserSnapshot) -> None:
+        super().set(key, value)
+        self._tg_by_id[value.id] = key
+        if len(self._tg_by_id) > self.maxsize * 2:
+            self._tg_by_id = {v.id: k for k, (_, v) in self._data.items()}
+
+    def invalidate_user_id(self, user_id: int) -> None:
+        tg_id = self._tg_by_id.pop(user_id, None)
+        if tg_id is not None:
+            self.invalidate(tg_id)
+
+    def clear(self) -> None:
+        super().clear()
+        self._tg_by_id.clear()
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+@dataclass(frozen=True)
+class TariffItem:
+    id: int
+    title: str
+    days: int
+    price_rub: int
+
+class TariffCatalog:
+    def __init__(self):
+        self.version = 0
+        self._items: Optional[List[TariffItem]] = None
+        self._by_id: Dict[int, TariffItem] = {}
+        self._markups: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._items is not None
+
+    def cached(self) -> Optional[List[TariffItem]]:
+        if self._items is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(self._items)
+
+    def items(self) -> List[TariffItem]:
+        return list(self._items or [])
+
+    def get(self, tariff_id: int) -> Optional[TariffItem]:
+        return self._by_id.get(tariff_id)
+
+    def load(self, items: List[TariffItem], version: int) -> None:
+        if version != self.version:
+            return
+        self._items = items
+        self._by_id = {t.id: t for t in items}
+        self._markups = {}
+
+    def markup(self, kind: str, items: List[TariffItem], build: Callable[[List[TariffItem]], Any]) -> Any:
+        if self._items is None:
+            return build(items)
+        m = self._markups.get(kind)
+        if m is None:
+            m = self._markups[kind] = build(self._items)
+        return m
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._items = None
+        self._by_id = {}
+        self._markups = {}
+
+tariff_catalog = TariffCatalog()
+
+registry.callback(
+    "vpn_cache_hits_total", "Cache hits", "counter", ["cache"],
+    lambda: {("user",): user_cache.hits, ("tariffs",): tariff_catalog.hits},
+)
+registry.callback(
+    "vpn_cache_misses_total", "Cache misses", "counter", ["cache"],
+    lambda: {("user",): user_cache.misses, ("tariffs",): tariff_catalog.misses},
+)
+registry.callback("vpn_user_cache_size", "Cached user snapshots", "gauge", [], lambda: {(): len(user_cache)})
+
+def after_commit(session: Session, fn: Callable[[], None]) -> None:
+    session.info.setdefault("after_commit", []).append(fn)
+
+def invalidate_user(session: Session, tg_id: int | None = None, user_id: int | None = None) -> None:
+    if tg_id is not None:
+        user_cache.invalidate(tg_id)
+        after_commit(session, lambda: user_cache.invalidate(tg_id))
+    if user_id is not None:
+        user_cache.invalidate_user_id(user_id)
+        after_commit(session, lambda: user_cache.invalidate_user_id(user_id))
+
+def invalidate_user_ids(session: Session, user_ids: List[int]) -> None:
+    for user_id in user_ids:
+        user_cache.invalidate_user_id(user_id)
+    def _again():
+        for user_id in user_ids:
+            user_cache.invalidate_user_id(user_id)
+    after_commit(session, _again)
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for fn in session.info.pop("after_commit", ()):
+        fn()
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session: Session) -> None:
+    session.info.pop("after_commit", None)
@@ -18,8 +18,65 @@ class Settings(BaseSettings):
     DEFAULT_DAYS: int = 30
     CURRENCY: str = "RUB"
     PRICE_MONTH: int = 399
+    USER_CACHE_SIZE: int = 50000
+    USER_CACHE_TTL: int = 60
+    EXPIRY_CHECK_INTERVAL: int = 60
+    EXPIRY_BATCH_SIZE: int = 1000
+    REMINDER_WINDOWS_HOURS: List[int] = [72, 24]
+    REMINDER_INTERVAL: int = 600
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_RATE: float = 25.0
+    PANEL_PROBE_INTERVAL: int = 30
+    PANEL_BREAKER_THRESHOLD: int = 3
+    PANEL_BREAKER_COOLDOWN: int = 30
+    XUI_RETRIES: int = 2
+    XUI_RETRY_BACKOFF: float = 0.3
+    XUI_SESSION_TTL: int = 900
+    XUI_INBOUNDS_TTL: int = 60
+    XUI_UPDATE_CONCURRENCY: int = 4
+    PANELS_PER_USER: int = 2
+    PLACEMENT_INTERVAL: int = 300
+    PLACEMENT_BATCH_SIZE: int = 500
+    PLACEMENT_LOAD_TTL: int = 30
+    PROVISION_WORKERS: int = 8
+    PROVISION_PANEL_CONCURRENCY: int = 2
+    PROVISION_MAX_ATTEMPTS: int = 8
+    PROVISION_POLL_INTERVAL: float = 5.0
+    NOTIFY_RATE: float = 25.0
+    TRAFFIC_INTERVAL: int = 300
+    QUERY_BUDGET_COUNT: int = 15
+    QUERY_BUDGET_MS: int = 250
+    LOOP_LAG_INTERVAL: float = 0.25
+    LOOP_STALL_THRESHOLD: float = 0.2
+    PROFILE_MAX_SECONDS: int = 60
+    ADMIN_API_TOKEN: str = ""
+    METRICS_TOKEN: str = ""
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_SAMPLE_SUBSCRIPTION: float = 0.01
+    LOG_SAMPLE_REQUESTS: float = 0.01
+    SUB_RATE_PER_UID: float = 0.2
+    SUB_BURST_PER_UID: int = 5
+    SUB_RATE_PER_IP: float = 5.0
+    SUB_BURST_PER_IP: int = 30
+    SUB_DEBUG_RATE_PER_UID: float = 0.02
+    SUB_DEBUG_BURST_PER_UID: int = 2
+    SUB_MAX_CONCURRENCY: int = 64
+    SUB_BODY_CACHE_TTL: int = 600
+    TRUST_FORWARDED_FOR: bool = False
+    ACTIVITY_FLUSH_INTERVAL: float = 15.0
+    ACTIVITY_BATCH_SIZE: int = 500
+    WARMUP_TIMEOUT: float = 20.0
+    READY_DB_TIMEOUT: float = 2.0
+    BOT_DEDUP_WINDOW: float = 1.5
+    BULK_BATCH_SIZE: int = 1000
+    ADMIN_PAGE_SIZE: int = 10
+    PAYMENT_ARCHIVE_DAYS: int = 90
+    PAYMENT_PENDING_TTL_DAYS: int = 7
+    PAYMENT_ARCHIVE_BATCH: int = 2000
+    PAYMENT_ARCHIVE_INTERVAL: int = 3600
 
-    @field_validator("ADMIN_IDS", mode="before")
+    @field_validator("ADMIN_IDS", "REMINDER_WINDOWS_HOURS", mode="before")
     @classmethod
     def parse_admins(cls, v):
         if isinstance(v, list):
@@ -1,13 +1,44 @@
+import time
+from sqlalchemy import event, func, DateTime
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.dialects import postgresql, sqlite
 from app.config import settings
+from app.metrics import db_query_seconds
+from app.profiler import record_query
 
 engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
 SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    db_query_seconds.observe(elapsed, verb)
+    record_query(statement, elapsed)
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(ctx):
+    if ctx.connection is not None and ctx.connection.info.get("query_started"):
+        ctx.connection.info["query_started"].pop()
+
 class Base(DeclarativeBase):
     pass
 
 async def get_session() -> AsyncSession:
     async with SessionLocal() as session:
         yield session
+
+def dialect_insert(session: AsyncSession, model):
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+def add_days(session: AsyncSession, column, days: int):
+    if session.bind.dialect.name == "postgresql":
+        return column + func.make_interval(0, 0, 0, days)
+    return func.datetime(column, f"{days:+d} days", type_=DateTime)
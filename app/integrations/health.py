@@ -0,0 +1,80 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from app.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+@dataclass
+class PanelHealth:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    trial_in_flight: bool = False
+    latency_ms: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    last_error: str = ""
+    last_checked: float = 0.0
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < settings.PANEL_BREAKER_COOLDOWN:
+                return False
+            self.state = HALF_OPEN
+            self.trial_in_flight = False
+        if self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self, latency: float) -> None:
+        ms = latency * 1000
+        self.latency_ms = ms if self.latency_ms is None else self.latency_ms * 0.8 + ms * 0.2
+        self.error_rate *= 0.8
+        self.requests += 1
+        self.failures = 0
+        self.state = CLOSED
+        self.trial_in_flight = False
+        self.last_checked = time.time()
+
+    def record_failure(self, error: str) -> None:
+        self.error_rate = self.error_rate * 0.8 + 0.2
+        self.requests += 1
+        self.errors += 1
+        self.failures += 1
+        self.last_error = error
+        self.last_checked = time.time()
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= settings.PANEL_BREAKER_THRESHOLD:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def available(self) -> bool:
+        if self.state != OPEN:
+            return True
+        return time.monotonic() - self.opened_at >= settings.PANEL_BREAKER_COOLDOWN
+
+    @property
+    def sort_key(self) -> float:
+        return self.latency_ms if self.latency_ms is not None else float("inf")
+
+class HealthRegistry:
+    def __init__(self):
+        self._items: Dict[str, PanelHealth] = {}
+
+    def get(self, base_url: str) -> PanelHealth:
+        key = base_url.rstrip("/")
+        h = self._items.get(key)
+        if h is None:
+            h = PanelHealth()
+            self._items[key] = h
+        return h
+
+panel_health = HealthRegistry()
@@ -1,12 +1,18 @@
 import time
 import json
+import random
+import asyncio
 import uuid as pyuuid
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import httpx
+from app.config import settings
+from app.integrations.health import panel_health
+from app.metrics import xui_seconds
 
 class XUIPanelClient:
-    def __init__(self, base_url: str, username: str, password: str, domain: str, verify_ssl: bool = False, timeout: float = 20.0):
+    def __init__(self, base_url: str, username: str, password: str, domain: str, verify_ssl: bool = False, timeout: float = 20.0, panel_id: int = 0):
         self.base_url = base_url.rstrip("/")
+        self.panel_id = panel_id
         self.username = username
         self.password = password
         self.domain = domain
@@ -14,36 +20,104 @@ class XUIPanelClient:
         self.timeout = timeout
         self._client: Optional[httpx.AsyncClient] = None
         self._authed = False
+        self._authed_at = 0.0
+        self._auth_lock = asyncio.Lock()
+        self._catalog: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+        self._catalog_lock = asyncio.Lock()
+        self.health = panel_health.get(self.base_url)
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
             self._client = httpx.AsyncClient(timeout=self.timeout, verify=self.verify_ssl, follow_redirects=True)
         return self._client
 
-    async def _auth(self) -> None:
-        if self._authed:
-            return
+    @staticmethod
+    def _op(path: str) -> str:
+        if path.endswith("login"):
+            return "login"
+        if path.startswith("/panel/api/inbounds/updateClient/"):
+            return "updateClient"
+        if path.endswith("/inbounds/list"):
+            return "list_inbounds"
+        return path.rsplit("/", 1)[-1]
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        op = self._op(path)
+        if not self.health.allow():
+            xui_seconds.observe(0.0, str(self.panel_id), op, "circuit_open")
+            raise RuntimeError("xui_circuit_open")
         c = await self._get_client()
-        r = await c.post(f"{self.base_url}/login", data={"username": self.username, "password": self.password})
-        if r.status_code == 200 and ("xui" in r.text.lower() or "dashboard" in r.text.lower()):
-            self._authed = True
+        started = time.monotonic()
+        attempt = 0
+        settled = False
+        try:
+            while True:
+                try:
+                    r = await c.request(method, f"{self.base_url}{path}", **kwargs)
+                    if r.status_code in (502, 503, 504):
+                        raise httpx.HTTPStatusError(f"status {r.status_code}", request=r.request, response=r)
+                    elapsed = time.monotonic() - started
+                    settled = True
+                    self.health.record_success(elapsed)
+                    xui_seconds.observe(elapsed, str(self.panel_id), op, str(r.status_code))
+                    return r
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    if attempt >= settings.XUI_RETRIES:
+                        settled = True
+                        self.health.record_failure(f"{type(e).__name__}: {e}")
+                        xui_seconds.observe(time.monotonic() - started, str(self.panel_id), op, "error")
+                        raise RuntimeError("xui_unavailable") from e
+                    attempt += 1
+                    await asyncio.sleep(random.uniform(0, settings.XUI_RETRY_BACKOFF * 2 ** attempt))
+                    started = time.monotonic()
+        except BaseException as e:
+            if not settled:
+                self.health.record_failure(f"{type(e).__name__}: {e}")
+                xui_seconds.observe(time.monotonic() - started, str(self.panel_id), op, "error")
+            raise
+
+    @property
+    def authed(self) -> bool:
+        return self._authed and time.monotonic() - self._authed_at < settings.XUI_SESSION_TTL
+
+    async def _auth(self) -> None:
+        if self.authed:
             return
-        r2 = await c.post(f"{self.base_url}/panel/api/login", json={"username": self.username, "password": self.password})
-        if r2.status_code == 200:
+        async with self._auth_lock:
+            if self.authed:
+                return
+            r = await self._request("POST", "/login", data={"username": self.username, "password": self.password})
+            if not (r.status_code == 200 and ("xui" in r.text.lower() or "dashboard" in r.text.lower())):
+                r2 = await self._request("POST", "/panel/api/login", json={"username": self.username, "password": self.password})
+                if r2.status_code != 200:
+                    raise RuntimeError("xui_auth_failed")
             self._authed = True
-            return
-        raise RuntimeError("xui_auth_failed")
+            self._authed_at = time.monotonic()
 
     async def list_inbounds(self) -> List[Dict[str, Any]]:
-        await self._auth()
-        c = await self._get_client()
-        r = await c.get(f"{self.base_url}/panel/api/inbounds/list")
-        if r.status_code == 200:
-            data = r.json()
-            items = data.get("obj") or data.get("data") or []
-            return items
+        for _ in range(2):
+            await self._auth()
+            r = await self._request("GET", "/panel/api/inbounds/list")
+            if r.status_code == 200:
+                try:
+                    data = r.json()
+                except ValueError:
+                    data = None
+                if isinstance(data, dict):
+                    items = data.get("obj") or data.get("data") or []
+                    self._catalog = (time.monotonic(), items)
+                    return items
+            self._authed = False
         raise RuntimeError("xui_list_inbounds_failed")
 
+    async def inbound_catalog(self) -> List[Dict[str, Any]]:
+        if self._catalog and time.monotonic() - self._catalog[0] < settings.XUI_INBOUNDS_TTL:
+            return self._catalog[1]
+        async with self._catalog_lock:
+            if self._catalog and time.monotonic() - self._catalog[0] < settings.XUI_INBOUNDS_TTL:
+                return self._catalog[1]
+            return await self.list_inbounds()
+
     def _parse_inbound(self, ib: Dict[str, Any]) -> Tuple[int, str, int, Dict[str, Any]]:
         _id = int(ib.get("id") or ib.get("Id") or 0)
         protocol = str(ib.get("protocol") or ib.get("Protocol") or "").lower()
@@ -58,7 +132,6 @@ class XUIPanelClient:
 
     async def ensure_client(self, inbound_id: int, email: str, uuid: str, expire_at_ts: int, total_gb: int = 0) -> None:
         await self._auth()
-        c = await self._get_client()
         payload = {
             "id": inbound_id,
             "settings": json.dumps({
@@ -77,14 +150,78 @@ class XUIPanelClient:
                 ]
             })
         }
-        r = await c.post(f"{self.base_url}/panel/api/inbounds/addClient", json=payload)
+        r = await self._request("POST", "/panel/api/inbounds/addClient", json=payload)
         if r.status_code == 200:
             return
-        r2 = await c.post(f"{self.base_url}/panel/api/inbounds/updateClient", json=payload)
+        r2 = await self._request("POST", f"/panel/api/inbounds/updateClient/{uuid}", json=payload)
         if r2.status_code == 200:
             return
+        self._authed = False
         raise RuntimeError("xui_add_or_update_client_failed")
 
+    async def client_traffic(self) -> Dict[str, Tuple[int, int]]:
+        usage: Dict[str, Tuple[int, int]] = {}
+        for ib in await self.list_inbounds():
+            for st in ib.get("clientStats") or []:
+                email = st.get("email")
+                if not email:
+                    continue
+                up, down = usage.get(email, (0, 0))
+                usage[email] = (up + int(st.get("up") or 0), down + int(st.get("down") or 0))
+        return usage
+
+    @staticmethod
+    def _client_key(client: Dict[str, Any]) -> str:
+        return str(client.get("id") or client.get("password") or client.get("email") or "")
+
+    async def _update_client(self, inbound_id: int, client: Dict[str, Any]) -> None:
+        payload = {"id": inbound_id, "settings": json.dumps({"clients": [client]})}
+        r = await self._request("POST", f"/panel/api/inbounds/updateClient/{self._client_key(client)}", json=payload)
+        if r.status_code != 200:
+            raise RuntimeError("xui_update_client_failed")
+
+    async def _patch_clients(self, patch: Callable[[Dict[str, Any]], bool]) -> int:
+        changed: List[Tuple[int, Dict[str, Any]]] = []
+        for ib in await self.list_inbounds():
+            _id = int(ib.get("id") or ib.get("Id") or 0)
+            conf = ib.get("settings") or {}
+            if isinstance(conf, str):
+                try:
+                    conf = json.loads(conf)
+                except Exception:
+                    continue
+            changed += [(_id, client) for client in conf.get("clients") or [] if self._client_key(client) and patch(client)]
+        sem = asyncio.Semaphore(settings.XUI_UPDATE_CONCURRENCY)
+        async def push(inbound_id: int, client: Dict[str, Any]) -> None:
+            async with sem:
+                await self._update_client(inbound_id, client)
+        await asyncio.gather(*(push(_id, client) for _id, client in changed))
+        return len(changed)
+
+    async def disable_clients(self, emails: Set[str]) -> int:
+        if not emails:
+            return 0
+        def patch(client: Dict[str, Any]) -> bool:
+            if client.get("email") in emails and client.get("enable", True):
+                client["enable"] = False
+                return True
+            return False
+        return await self._patch_clients(patch)
+
+    async def set_clients_expiry(self, expiries: Dict[str, int]) -> int:
+        if not expiries:
+            return 0
+        def patch(client: Dict[str, Any]) -> bool:
+            ts = expiries.get(client.get("email"))
+            if ts is None:
+                return False
+            if client.get("expiryTime") == ts * 1000 and client.get("enable", True):
+                return False
+            client["expiryTime"] = ts * 1000
+            client["enable"] = True
+            return True
+        return await self._patch_clients(patch)
+
     def _vless_link(self, uuid: str, port: int, stream: Dict[str, Any], label: str) -> str:
         net = (stream.get("network") or "").lower()
         tls = stream.get("security") == "tls"
@@ -118,7 +255,7 @@ class XUIPanelClient:
         return f"vless://{uuid}@{self.domain}:{port}?{query}#{label}"
 
     async def provision_user_for_all_vless(self, email: str, uuid: str, expire_at_ts: int) -> List[str]:
-        inbounds = await self.list_inbounds()
+        inbounds = await self.inbound_catalog()
         links: List[str] = []
         for ib in inbounds:
             _id, protocol, port, stream = self._parse_inbound(ib)
@@ -128,11 +265,49 @@ class XUIPanelClient:
             links.append(self._vless_link(uuid, port, stream, label=email))
         return links
 
+    async def probe(self) -> float:
+        started = time.monotonic()
+        self._authed = False
+        await self.list_inbounds()
+        return time.monotonic() - started
+
     async def close(self) -> None:
         if self._client is not None:
             await self._client.aclose()
             self._client = None
         self._authed = False
+        self._catalog = None
+
+class XUIClientPool:
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str, str, str], XUIPanelClient] = {}
+
+    @staticmethod
+    def _key(panel) -> Tuple[str, str, str, str]:
+        return (panel.base_url.rstrip("/"), panel.username, panel.password, panel.domain)
+
+    def get(self, panel) -> XUIPanelClient:
+        key = self._key(panel)
+        client = self._clients.get(key)
+        if client is None:
+            client = XUIPanelClient(panel.base_url, panel.username, panel.password, panel.domain, verify_ssl=False, panel_id=panel.id)
+            self._clients[key] = client
+        return client
+
+    async def retain(self, panels) -> None:
+        keep = {self._key(p) for p in panels}
+        for key in [k for k in self._clients if k not in keep]:
+            await self._clients.pop(key).close()
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+xui_pool = XUIClientPool()
 
 def deterministic_uuid(namespace: str, user_key: str) -> str:
     ns = pyuuid.uuid5(pyuuid.NAMESPACE_DNS, namespace)
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+from app.activity import activity
+from app.config import settings
+from app.db import SessionLocal
+from app.repositories.users import UserRepository
+
+log = logging.getLogger(__name__)
+
+async def flush_activity() -> int:
+    pending = activity.drain()
+    if not pending:
+        return 0
+    items = list(pending.items())
+    try:
+        async with SessionLocal() as s:
+            repo = UserRepository(s)
+            for i in range(0, len(items), settings.ACTIVITY_BATCH_SIZE):
+                await repo.apply_activity(items[i:i + settings.ACTIVITY_BATCH_SIZE])
+            await s.commit()
+    except Exception:
+        activity.restore(items)
+        raise
+    return len(items)
+
+async def run_activity_flusher():
+    try:
+        while True:
+            await asyncio.sleep(settings.ACTIVITY_FLUSH_INTERVAL)
+            try:
+                await flush_activity()
+            except Exception:
+                log.exception("Activity flush failed")
+    finally:
+        try:
+            await flush_activity()
+        except Exception:
+            log.exception("Final activity flush failed")
@@ -0,0 +1,35 @@
+import asyncio
+import logging
+import datetime as dt
+from app.config import settings
+from app.db import SessionLocal
+from app.repositories.payments import PaymentRepository
+
+log = logging.getLogger(__name__)
+
+async def archive_payments(now: dt.datetime | None = None) -> int:
+    now = now or dt.datetime.utcnow()
+    settled_before = now - dt.timedelta(days=settings.PAYMENT_ARCHIVE_DAYS)
+    pending_before = now - dt.timedelta(days=settings.PAYMENT_PENDING_TTL_DAYS)
+    moved = 0
+    steps = ((PaymentRepository.archive_settled, settled_before), (PaymentRepository.archive_abandoned, pending_before))
+    for archive, before in steps:
+        while True:
+            async with SessionLocal() as s:
+                n = await archive(PaymentRepository(s), before, settings.PAYMENT_ARCHIVE_BATCH)
+                await s.commit()
+            moved += n
+            if n < settings.PAYMENT_ARCHIVE_BATCH:
+                break
+            await asyncio.sleep(0)
+    if moved:
+        log.info("Archived %s payments", moved)
+    return moved
+
+async def run_payment_archiver():
+    while True:
+        try:
+            await archive_payments()
+        except Exception:
+            log.exception("Payment archival failed")
+        await asyncio.sleep(settings.PAYMENT_ARCHIVE_INTERVAL)
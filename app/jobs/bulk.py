@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import datetime as dt
+from app.config import settings
+from app.db import SessionLocal
+from app.repositories.panels import PanelRepository
+from app.repositories.subscriptions import SubscriptionRepository
+from app.repositories.users import UserRepository
+from app.integrations.xui_client import xui_pool
+
+log = logging.getLogger(__name__)
+
+Progress = Callable[[int, int], Awaitable[None]]
+
+@dataclass
+class BulkReport:
+    total: int = 0
+    processed: int = 0
+    panel_clients: int = 0
+    panel_errors: int = 0
+
+async def _push_expiries(rows: List[Tuple[int, int, dt.datetime]], report: BulkReport) -> None:
+    expires_by_user = {user_id: expires_at for _, user_id, expires_at in rows}
+    async with SessionLocal() as s:
+        repo = PanelRepository(s)
+        panels = {p.id: p for p in await repo.list_active()}
+        assignments = await repo.assignments_for(list(expires_by_user))
+    per_panel: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for panel_id, user_id, tg_id in assignments:
+        ts = int(expires_by_user[user_id].replace(tzinfo=dt.timezone.utc).timestamp())
+        per_panel[panel_id][f"{tg_id}@bot"] = ts
+    items = [(panels[pid], expiries) for pid, expiries in per_panel.items() if pid in panels]
+    results = await asyncio.gather(
+        *(xui_pool.get(p).set_clients_expiry(expiries) for p, expiries in items),
+        return_exceptions=True,
+    )
+    for (p, _), r in zip(items, results):
+        if isinstance(r, Exception):
+            report.panel_errors += 1
+            log.warning("Bulk expiry update on panel %s failed: %s", p.id, r)
+        else:
+            report.panel_clients += r
+
+async def extend_subscriptions(days: int, progress: Optional[Progress] = None) -> BulkReport:
+    async with SessionLocal() as s:
+        report = BulkReport(total=await SubscriptionRepository(s).count_active())
+    after_id = 0
+    while True:
+        async with SessionLocal() as s:
+            rows = await SubscriptionRepository(s).extend_active(days, after_id, settings.BULK_BATCH_SIZE)
+            await s.commit()
+        if not rows:
+            break
+        after_id = max(sub_id for sub_id, _, _ in rows)
+        report.processed += len(rows)
+        await _push_expiries(rows, report)
+        if progress:
+            await progress(report.processed, report.total)
+        if len(rows) < settings.BULK_BATCH_SIZE:
+            break
+    log.info("Extended %s subscriptions by %s days, %s panel clients updated", report.processed, days, report.panel_clients)
+    return report
+
+async def credit_balances(amount: int, only_active: bool, progress: Optional[Progress] = None) -> BulkReport:
+    async with SessionLocal() as s:
+        report = BulkReport(total=await UserRepository(s).count(only_active))
+    after_id = 0
+    while True:
+        async with SessionLocal() as s:
+            user_ids = await UserRepository(s).credit(amount, after_id, settings.BULK_BATCH_SIZE, only_active)
+            await s.commit()
+        if not user_ids:
+            break
+        after_id = user_ids[-1]
+        report.processed += len(user_ids)
+        if progress:
+            await progress(report.processed, report.total)
+        if len(user_ids) < settings.BULK_BATCH_SIZE:
+            break
+    log.info("Credited %s to %s users", amount, report.processed)
+    return report
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import datetime as dt
+from typing import List
+from app.config import settings
+from app.db import SessionLocal
+from app.repositories.panels import PanelRepository
+from app.repositories.subscriptions import SubscriptionRepository
+from app.services.panels import PanelService
+
+log = logging.getLogger(__name__)
+
+async def expire_due(now: dt.datetime | None = None) -> int:
+    now = now or dt.datetime.utcnow()
+    user_ids: List[int] = []
+    while True:
+        async with SessionLocal() as s:
+            batch = await SubscriptionRepository(s).expire_due(now, settings.EXPIRY_BATCH_SIZE)
+            await s.commit()
+        user_ids.extend(batch)
+        if len(batch) < settings.EXPIRY_BATCH_SIZE:
+            break
+    if not user_ids:
+        return 0
+    async with SessionLocal() as s:
+        tg_ids = await SubscriptionRepository(s).tg_ids_without_active(user_ids)
+        disabled = await PanelService(PanelRepository(s)).disable_users(tg_ids)
+    log.info("Expired %s subscriptions, disabled %s panel clients", len(user_ids), disabled)
+    return len(user_ids)
+
+async def run_expiry_scheduler():
+    while True:
+        delay = settings.EXPIRY_CHECK_INTERVAL
+        try:
+            await expire_due()
+            async with SessionLocal() as s:
+                nxt = await SubscriptionRepository(s).next_expiry()
+            if nxt is not None:
+                delay = min(delay, max(1.0, (nxt - dt.datetime.utcnow()).total_seconds()))
+        except Exception:
+            log.exception("Expiry tick failed")
+        await asyncio.sleep(delay)
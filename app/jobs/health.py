@@ -0,0 +1,32 @@
+import asyncio
+import logging
+from app.config import settings
+from app.db import SessionLocal
+from app.models import Panel
+from app.repositories.panels import PanelRepository
+from app.integrations.xui_client import XUIPanelClient, xui_pool
+
+log = logging.getLogger(__name__)
+
+async def _probe(p: Panel) -> None:
+    client = XUIPanelClient(p.base_url, p.username, p.password, p.domain, verify_ssl=False, panel_id=p.id)
+    try:
+        await client.probe()
+    except Exception as e:
+        log.debug("Probe of panel %s failed: %s", p.id, e)
+    finally:
+        await client.close()
+
+async def probe_panels() -> None:
+    async with SessionLocal() as s:
+        items = await PanelRepository(s).list_active()
+    await xui_pool.retain(items)
+    await asyncio.gather(*(_probe(p) for p in items))
+
+async def run_panel_prober():
+    while True:
+        try:
+            await probe_panels()
+        except Exception:
+            log.exception("Panel probe failed")
+        await asyncio.sleep(settings.PANEL_PROBE_INTERVAL)
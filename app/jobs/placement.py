@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Dict, List
+from app.config import settings
+from app.db import SessionLocal
+from app.repositories.panels import PanelRepository
+from app.services.panels import PanelService
+from app.services.placement import PlacementService, panel_load, user_lock
+
+log = logging.getLogger(__name__)
+
+async def rebalance() -> int:
+    moved: Dict[int, List[int]] = {}
+    async with SessionLocal() as s:
+        repo = PanelRepository(s)
+        placement = PlacementService(repo)
+        active = await repo.list_active()
+        load = await repo.load()
+        panel_load.set(load)
+        spare = sum(max(p.capacity - load.get(p.id, 0), 0) for p in active)
+        for p in active:
+            excess = min(load.get(p.id, 0) - p.capacity, spare, settings.PLACEMENT_BATCH_SIZE)
+            if excess <= 0:
+                continue
+            shed = await repo.shed(p.id, excess)
+            load[p.id] -= len(shed)
+            spare -= len(shed)
+            moved[p.id] = shed
+        for pid, tg_ids in moved.items():
+            for tg_id in tg_ids:
+                async with user_lock(tg_id):
+                    await placement.place(tg_id, active, load, exclude=[pid])
+                    await s.commit()
+        placed = 0
+        for tg_id in await repo.under_assigned(min(placement.per_user, len(active)), settings.PLACEMENT_BATCH_SIZE):
+            async with user_lock(tg_id):
+                await placement.place(tg_id, active, load)
+                await s.commit()
+            placed += 1
+        await s.commit()
+        panels = {p.id: p for p in active}
+        pservice = PanelService(repo)
+        for pid, tg_ids in moved.items():
+            await pservice.disable_users(tg_ids, [panels[pid]])
+    total = placed + sum(len(v) for v in moved.values())
+    if total:
+        log.info("Placement: assigned %s users, moved %s", placed, total - placed)
+    return total
+
+async def run_placement_rebalancer():
+    while True:
+        try:
+            await rebalance()
+        except Exception:
+            log.exception("Placement rebalance failed")
+        await asyncio.sleep(settings.PLACEMENT_INTERVAL)
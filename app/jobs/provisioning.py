@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from html import escape as h
+from typing import Set
+from app.config import settings
+from app.db import SessionLocal
+from app.models import ProvisioningJob
+from app.repositories.panels import PanelRepository
+from app.repositories.provisioning import ProvisioningRepository, job_enqueued
+from app.services.panels import PanelService
+from app.bot.launcher import bot, sub_link_for_tg
+from app.bot.sender import RateLimitedSender
+
+log = logging.getLogger(__name__)
+
+sender = RateLimitedSender(bot, settings.NOTIFY_RATE)
+
+async def notify_failed(job: ProvisioningJob, error: str) -> None:
+    await sender.send(job.tg_id, "⚠️ Не удалось выдать ключи. Подписка сохранена, администратор уже получил уведомление.")
+    for admin_id in settings.ADMIN_IDS:
+        await sender.send(admin_id, f"⚠️ Выдача ключей не удалась: задача #{job.id}, пользователь <code>{job.tg_id}</code>, попыток {job.attempts}\n<code>{h(error[:500])}</code>")
+
+async def process_job(job: ProvisioningJob) -> bool:
+    async with SessionLocal() as s:
+        try:
+            links = await PanelService(PanelRepository(s)).provision_user(job.tg_id, job.days)
+            if not links:
+                raise RuntimeError("no_links")
+            await ProvisioningRepository(s).complete(job.id)
+            await s.commit()
+        except Exception as e:
+            await s.rollback()
+            status = await ProvisioningRepository(s).retry_or_fail(job, str(e))
+            await s.commit()
+            log.warning("Provisioning job %s for %s %s: %s", job.id, job.tg_id, status, e)
+            if status == "failed":
+                await notify_failed(job, str(e))
+            return False
+    sub, _ = await sub_link_for_tg(job.tg_id)
+    await sender.send(job.tg_id, f"🔑 Ключи готовы и уже работают.\n\n🔗 Ссылка-подписка:\n<code>{h(sub)}</code>")
+    return True
+
+async def run_provisioning_workers():
+    async with SessionLocal() as s:
+        await ProvisioningRepository(s).reset_running()
+        await s.commit()
+    running: Set[asyncio.Task] = set()
+    while True:
+        try:
+            if len(running) >= settings.PROVISION_WORKERS:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            job_enqueued.clear()
+            async with SessionLocal() as s:
+                jobs = await ProvisioningRepository(s).claim(settings.PROVISION_WORKERS - len(running))
+                await s.commit()
+            for job in jobs:
+                t = asyncio.create_task(process_job(job), name=f"provision:{job.id}")
+                running.add(t)
+                t.add_done_callback(running.discard)
+            if not jobs:
+                try:
+                    await asyncio.wait_for(job_enqueued.wait(), settings.PROVISION_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        except Exception:
+            log.exception("Provisioning dispatcher failed")
+            await asyncio.sleep(settings.PROVISION_POLL_INTERVAL)
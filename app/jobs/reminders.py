@@ -0,0 +1,43 @@
+import asyncio
+import logging
+import datetime as dt
+from app.config import settings
+from app.db import SessionLocal
+from app.repositories.reminders import ReminderRepository
+from app.bot.launcher import bot, tariff_items, buy_tariffs_markup
+from app.bot.sender import RateLimitedSender
+
+log = logging.getLogger(__name__)
+
+sender = RateLimitedSender(bot, settings.REMINDER_RATE)
+
+async def send_reminders(now: dt.datetime | None = None) -> int:
+    now = now or dt.datetime.utcnow()
+    windows = sorted(set(settings.REMINDER_WINDOWS_HOURS))
+    kb = buy_tariffs_markup(await tariff_items())
+    sent = 0
+    for window in windows:
+        later = [w for w in windows if w >= window]
+        while True:
+            async with SessionLocal() as s:
+                repo = ReminderRepository(s)
+                batch = await repo.due(window, now, settings.REMINDER_BATCH_SIZE)
+                await repo.mark_sent([sid for sid, _, _ in batch], later)
+                await s.commit()
+            for _, tg_id, expires_at in batch:
+                text = f"⏳ Ваша подписка действует до {expires_at.date().isoformat()}.\nПродлите её, чтобы не потерять доступ:"
+                if await sender.send(tg_id, text, reply_markup=kb):
+                    sent += 1
+            if len(batch) < settings.REMINDER_BATCH_SIZE:
+                break
+    return sent
+
+async def run_reminders():
+    while True:
+        try:
+            sent = await send_reminders()
+            if sent:
+                log.info("Sent %s renewal reminders", sent)
+        except Exception:
+            log.exception("Reminder tick failed")
+        await asyncio.sleep(settings.REMINDER_INTERVAL)
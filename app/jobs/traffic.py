@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from typing import Dict, Tuple
+from app.config import settings
+from app.db import SessionLocal
+from app.models import Panel
+from app.repositories.panels import PanelRepository
+from app.repositories.traffic import TrafficRepository
+from app.integrations.xui_client import xui_pool
+
+log = logging.getLogger(__name__)
+
+def _by_tg_id(raw: Dict[str, Tuple[int, int]]) -> Dict[int, Tuple[int, int]]:
+    usage: Dict[int, Tuple[int, int]] = {}
+    for email, (up, down) in raw.items():
+        local, _, domain = email.partition("@")
+        if domain != "bot" or not local.isdigit():
+            continue
+        usage[int(local)] = (up, down)
+    return usage
+
+async def _collect(p: Panel) -> int:
+    usage = _by_tg_id(await xui_pool.get(p).client_traffic())
+    async with SessionLocal() as s:
+        changed = await TrafficRepository(s).store(p.id, usage)
+        await s.commit()
+    return changed
+
+async def collect_traffic() -> int:
+    async with SessionLocal() as s:
+        items = await PanelRepository(s).list_active()
+    results = await asyncio.gather(*(_collect(p) for p in items), return_exceptions=True)
+    changed = 0
+    for p, r in zip(items, results):
+        if isinstance(r, Exception):
+            log.warning("Traffic collection on panel %s failed: %s", p.id, r)
+        else:
+            changed += r
+    return changed
+
+async def run_traffic_collector():
+    while True:
+        try:
+            await collect_traffic()
+        except Exception:
+            log.exception("Traffic collection failed")
+        await asyncio.sleep(settings.TRAFFIC_INTERVAL)
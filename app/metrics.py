@@ -0,0 +1,151 @@
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()):
+        super().__init__(name, doc, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = tuple(str(x) for x in labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(tuple(str(x) for x in labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in sorted(self._values.items())]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = tuple(str(x) for x in labels)
+        item = self._values.get(key)
+        if item is None:
+            item = ([0] * (len(self.buckets) + 1), [0.0])
+            self._values[key] = item
+        counts, total = item
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    @contextmanager
+    def track(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.observe(time.perf_counter() - started, *labels, status)
+
+    def count(self, *labels: str) -> int:
+        item = self._values.get(tuple(str(x) for x in labels))
+        return sum(item[0]) if item else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {acc}")
+            acc += counts[-1]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total[0]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {acc}")
+        return lines
+
+class CallbackMetric(Metric):
+    def __init__(self, name: str, doc: str, kind: str, labels: Sequence[str], fn: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, doc, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in sorted(self.fn().items())]
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, doc: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, doc, labels))
+
+    def histogram(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, doc, labels, buckets))
+
+    def callback(self, name: str, doc: str, kind: str, labels: Sequence[str], fn: Callable[[], Dict[Tuple[str, ...], float]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, doc, kind, labels, fn))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+registry = Registry()
+
+subscription_seconds = registry.histogram("vpn_subscription_request_seconds", "Subscription endpoint latency", ["outcome"])
+xui_seconds = registry.histogram("vpn_xui_request_seconds", "X-UI API call latency", ["panel", "op", "status"])
+payment_seconds = registry.histogram("vpn_payment_api_seconds", "Payment provider API latency", ["provider", "op", "status"])
+bot_handler_seconds = registry.histogram("vpn_bot_handler_seconds", "Bot update handling latency", ["handler", "status"])
+telegram_errors = registry.counter("vpn_telegram_api_errors_total", "Telegram Bot API errors", ["method", "error"])
+telegram_retry_after = registry.counter("vpn_telegram_retry_after_total", "Telegram RetryAfter responses", ["method"])
+bot_duplicate_callbacks = registry.counter("vpn_bot_duplicate_callbacks_total", "Callback queries dropped as repeated taps", ["handler"])
+db_query_seconds = registry.histogram(
+    "vpn_db_query_seconds",
+    "Database statement latency",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
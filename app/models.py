@@ -1,5 +1,5 @@
 import datetime as dt
-from sqlalchemy import String, Integer, BigInteger, DateTime, Boolean, ForeignKey, Text, Numeric
+from sqlalchemy import String, Integer, BigInteger, Date, DateTime, Boolean, ForeignKey, Text, Numeric, Index, UniqueConstraint, LargeBinary, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db import Base
 
@@ -11,9 +11,12 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     tos_accepted_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
     balance: Mapped[int] = mapped_column(Integer, default=0)
+    last_seen_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
     subscriptions: Mapped[list["Subscription"]] = relationship(back_populates="user")
 
+Index("ix_users_username_lower", func.lower(User.username))
+
 class Panel(Base):
     __tablename__ = "panels"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -23,10 +26,12 @@ class Panel(Base):
     password: Mapped[str] = mapped_column(String(128))
     domain: Mapped[str] = mapped_column(String(255))
     active: Mapped[bool] = mapped_column(Boolean, default=True)
+    capacity: Mapped[int] = mapped_column(Integer, default=1000)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (Index("ix_subscriptions_status_expires_at", "status", "expires_at"),)
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     status: Mapped[str] = mapped_column(String(32), default="active")
@@ -36,6 +41,11 @@ class Subscription(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_user_id_id", "user_id", "id"),
+        Index("ix_payments_status_created_at", "status", "created_at"),
+        Index("ix_payments_updated_at", "updated_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     provider: Mapped[str] = mapped_column(String(32))
@@ -47,6 +57,21 @@ class Payment(Base):
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
     updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
 
+class PaymentArchive(Base):
+    __tablename__ = "payments_archive"
+    __table_args__ = (Index("ix_payments_archive_provider_external_id", "provider", "external_id"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(Integer, index=True)
+    provider: Mapped[str] = mapped_column(String(32))
+    external_id: Mapped[str] = mapped_column(String(100))
+    amount: Mapped[int] = mapped_column(Integer)
+    currency: Mapped[str] = mapped_column(String(10))
+    status: Mapped[str] = mapped_column(String(32))
+    raw: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime)
+    archived_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
 class Broadcast(Base):
     __tablename__ = "broadcasts"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -61,3 +86,60 @@ class Tariff(Base):
     price_rub: Mapped[int] = mapped_column(Integer)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+class SubscriptionReminder(Base):
+    __tablename__ = "subscription_reminders"
+    __table_args__ = (UniqueConstraint("subscription_id", "window_hours", name="uq_subscription_reminders_sub_window"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    subscription_id: Mapped[int] = mapped_column(ForeignKey("subscriptions.id"))
+    window_hours: Mapped[int] = mapped_column(Integer)
+    sent_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+class PanelAssignment(Base):
+    __tablename__ = "panel_assignments"
+    __table_args__ = (UniqueConstraint("user_id", "panel_id", name="uq_panel_assignments_user_panel"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    panel_id: Mapped[int] = mapped_column(ForeignKey("panels.id"), index=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+class ProvisioningJob(Base):
+    __tablename__ = "provisioning_jobs"
+    __table_args__ = (Index("ix_provisioning_jobs_status_next_attempt_at", "status", "next_attempt_at"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    tg_id: Mapped[int] = mapped_column(BigInteger)
+    days: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String(32), default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
+
+class UserTraffic(Base):
+    __tablename__ = "user_traffic"
+    __table_args__ = (UniqueConstraint("tg_id", "panel_id", name="uq_user_traffic_tg_panel"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    tg_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    panel_id: Mapped[int] = mapped_column(Integer)
+    up: Mapped[int] = mapped_column(BigInteger, default=0)
+    down: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+class DailyStat(Base):
+    __tablename__ = "daily_stats"
+    __table_args__ = (UniqueConstraint("day", "metric", "dim", name="uq_daily_stats_day_metric_dim"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    day: Mapped[dt.date] = mapped_column(Date, index=True)
+    metric: Mapped[str] = mapped_column(String(32))
+    dim: Mapped[str] = mapped_column(String(64), default="")
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
+
+class StatTotal(Base):
+    __tablename__ = "stat_totals"
+    __table_args__ = (UniqueConstraint("metric", "dim", name="uq_stat_totals_metric_dim"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    metric: Mapped[str] = mapped_column(String(32))
+    dim: Mapped[str] = mapped_column(String(64), default="")
+    value: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,63 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+class QueryProfile:
+    def __init__(self, name: str, top: int = 5):
+        self.name = name
+        self.top = top
+        self.count = 0
+        self.total = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.started = time.perf_counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if len(self.slowest) < self.top or elapsed > self.slowest[-1][0]:
+            self.slowest.append((elapsed, " ".join(statement.split())[:300]))
+            self.slowest.sort(key=lambda x: x[0], reverse=True)
+            del self.slowest[self.top:]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.count > settings.QUERY_BUDGET_COUNT or self.total * 1000 > settings.QUERY_BUDGET_MS
+
+    def summary(self) -> str:
+        lines = [f"{self.name}: {self.count} queries, {self.total * 1000:.1f} ms in DB, {(time.perf_counter() - self.started) * 1000:.1f} ms total"]
+        lines.extend(f"  {t * 1000:.1f} ms  {sql}" for t, sql in self.slowest)
+        return "\n".join(lines)
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+
+def record_query(statement: str, elapsed: float) -> None:
+    p = current_profile.get()
+    if p is not None:
+        p.record(statement, elapsed)
+
+@contextmanager
+def profile(name: str) -> Iterator[QueryProfile]:
+    p = QueryProfile(name)
+    token = current_profile.set(p)
+    try:
+        yield p
+    finally:
+        current_profile.reset(token)
+        if p.over_budget:
+            log.warning("Query budget exceeded\n%s", p.summary())
+
+@contextmanager
+def assert_max_queries(limit: int, name: str = "assert_max_queries") -> Iterator[QueryProfile]:
+    p = QueryProfile(name, top=limit + 5)
+    token = current_profile.set(p)
+    try:
+        yield p
+    finally:
+        current_profile.reset(token)
+    if p.count > limit:
+        raise AssertionError(f"expected at most {limit} queries, got {p.count}\n{p.summary()}")
@@ -0,0 +1,62 @@
+import time
+import math
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+from app.config import settings
+from app.metrics import registry
+
+shed_total = registry.counter("vpn_subscription_shed_total", "Subscription requests rejected or served from cache by load shedding", ["reason", "served"])
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: int, maxsize: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def hit(self, key: Hashable, cost: float = 1.0) -> float:
+        if self.burst <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        return (cost - tokens) / self.rate if self.rate > 0 else 60.0
+
+class ConcurrencyGate:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.inflight = 0
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= self.limit:
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self) -> None:
+        self.inflight -= 1
+
+ip_limiter = TokenBucketLimiter(settings.SUB_RATE_PER_IP, settings.SUB_BURST_PER_IP)
+uid_limiter = TokenBucketLimiter(settings.SUB_RATE_PER_UID, settings.SUB_BURST_PER_UID)
+debug_limiter = TokenBucketLimiter(settings.SUB_DEBUG_RATE_PER_UID, settings.SUB_DEBUG_BURST_PER_UID)
+subscription_gate = ConcurrencyGate(settings.SUB_MAX_CONCURRENCY)
+
+registry.callback("vpn_subscription_inflight", "Subscription requests in flight", "gauge", [], lambda: {(): subscription_gate.inflight})
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+def client_ip(headers, client: Optional[Tuple[str, int]]) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        fwd = headers.get("x-forwarded-for")
+        if fwd:
+            return fwd.split(",", 1)[0].strip()
+    return client[0] if client else "unknown"
@@ -1,7 +1,9 @@
-from typing import List, Optional
-from sqlalchemy import select, insert, update, delete
+import datetime as dt
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, update, delete, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Panel
+from app.db import dialect_insert
+from app.models import Panel, PanelAssignment, Subscription, User
 
 class PanelRepository:
     def __init__(self, session: AsyncSession):
@@ -15,6 +17,10 @@ class PanelRepository:
         res = await self.session.execute(select(Panel))
         return list(res.scalars())
 
+    async def page(self, after_id: int, limit: int) -> List[Panel]:
+        res = await self.session.execute(select(Panel).where(Panel.id > after_id).order_by(Panel.id).limit(limit))
+        return list(res.scalars())
+
     async def get(self, panel_id: int) -> Optional[Panel]:
         res = await self.session.execute(select(Panel).where(Panel.id == panel_id))
         return res.scalar_one_or_none()
@@ -38,4 +44,75 @@ class PanelRepository:
         )
 
     async def delete(self, panel_id: int) -> None:
+        await self.session.execute(delete(PanelAssignment).where(PanelAssignment.panel_id == panel_id))
         await self.session.execute(delete(Panel).where(Panel.id == panel_id))
+
+    async def assigned_to(self, tg_id: int) -> List[Panel]:
+        res = await self.session.execute(
+            select(Panel)
+            .join(PanelAssignment, PanelAssignment.panel_id == Panel.id)
+            .join(User, User.id == PanelAssignment.user_id)
+            .where(User.tg_id == tg_id, Panel.active == True)
+        )
+        return list(res.scalars())
+
+    async def assignments_for(self, user_ids: List[int]) -> List[Tuple[int, int, int]]:
+        if not user_ids:
+            return []
+        res = await self.session.execute(
+            select(PanelAssignment.panel_id, User.id, User.tg_id)
+            .join(User, User.id == PanelAssignment.user_id)
+            .join(Panel, and_(Panel.id == PanelAssignment.panel_id, Panel.active == True))
+            .where(PanelAssignment.user_id.in_(user_ids))
+        )
+        return [tuple(r) for r in res.all()]
+
+    async def load(self) -> Dict[int, int]:
+        res = await self.session.execute(
+            select(PanelAssignment.panel_id, func.count())
+            .join(Subscription, and_(Subscription.user_id == PanelAssignment.user_id, Subscription.status == "active"))
+            .group_by(PanelAssignment.panel_id)
+        )
+        return {pid: cnt for pid, cnt in res.all()}
+
+    async def assign(self, tg_id: int, panel_ids: List[int]) -> None:
+        res = await self.session.execute(select(User.id).where(User.tg_id == tg_id))
+        user_id = res.scalar_one_or_none()
+        if user_id is None or not panel_ids:
+            return
+        now = dt.datetime.utcnow()
+        stmt = dialect_insert(self.session, PanelAssignment).values(
+            [{"user_id": user_id, "panel_id": pid, "created_at": now} for pid in panel_ids]
+        )
+        await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["user_id", "panel_id"]))
+
+    async def under_assigned(self, per_user: int, limit: int) -> List[int]:
+        counts = (
+            select(PanelAssignment.user_id, func.count().label("n"))
+            .join(Panel, and_(Panel.id == PanelAssignment.panel_id, Panel.active == True))
+            .group_by(PanelAssignment.user_id)
+            .subquery()
+        )
+        res = await self.session.execute(
+            select(User.tg_id)
+            .join(Subscription, and_(Subscription.user_id == User.id, Subscription.status == "active"))
+            .outerjoin(counts, counts.c.user_id == User.id)
+            .where(func.coalesce(counts.c.n, 0) < per_user)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        return list(res.scalars())
+
+    async def shed(self, panel_id: int, count: int) -> List[int]:
+        res = await self.session.execute(
+            select(PanelAssignment.id, User.tg_id)
+            .join(User, User.id == PanelAssignment.user_id)
+            .join(Subscription, and_(Subscription.user_id == User.id, Subscription.status == "active"))
+            .where(PanelAssignment.panel_id == panel_id)
+            .order_by(PanelAssignment.id.desc())
+            .limit(count)
+        )
+        rows = res.all()
+        if rows:
+            await self.session.execute(delete(PanelAssignment).where(PanelAssignment.id.in_([aid for aid, _ in rows])))
+        return [tg_id for _, tg_id in rows]
@@ -1,6 +1,13 @@
-from sqlalchemy import select
+import zlib
+import datetime as dt
+from typing import List, Optional
+from sqlalchemy import select, update, insert, delete, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Payment
+from app.models import Payment, PaymentArchive
+from app.repositories.stats import StatsRepository
+
+def compress_raw(raw: str | None) -> bytes | None:
+    return zlib.compress(raw.encode(), 6) if raw else None
 
 class PaymentRepository:
     def __init__(self, session: AsyncSession):
@@ -27,3 +34,48 @@ class PaymentRepository:
             )
         )
         return res.scalar_one_or_none()
+
+    async def mark_paid(self, provider: str, external_id: str) -> Payment | None:
+        res = await self.session.execute(
+            update(Payment)
+            .where(Payment.provider == provider, Payment.external_id == external_id, Payment.status == "pending")
+            .values(status="paid", updated_at=dt.datetime.utcnow())
+            .returning(Payment)
+            .execution_options(synchronize_session=False)
+        )
+        payment = res.scalar_one_or_none()
+        if payment:
+            await StatsRepository(self.session).payment_settled(payment.provider, payment.currency, payment.amount)
+        return payment
+
+    async def page(self, before_id: int, limit: int, user_id: Optional[int] = None) -> List[Payment]:
+        q = select(Payment).order_by(Payment.id.desc()).limit(limit)
+        if user_id is not None:
+            q = q.where(Payment.user_id == user_id)
+        if before_id:
+            q = q.where(Payment.id < before_id)
+        res = await self.session.execute(q)
+        return list(res.scalars())
+
+    async def _archive(self, where, limit: int) -> int:
+        res = await self.session.execute(select(Payment.__table__).where(where).limit(limit))
+        rows = [dict(r) for r in res.mappings()]
+        if not rows:
+            return 0
+        now = dt.datetime.utcnow()
+        for r in rows:
+            if r["status"] == "pending":
+                r["status"] = "expired"
+            r["raw"] = compress_raw(r["raw"])
+            r["archived_at"] = now
+        await self.session.execute(insert(PaymentArchive), rows)
+        await self.session.execute(
+            delete(Payment).where(Payment.id.in_([r["id"] for r in rows])).execution_options(synchronize_session=False)
+        )
+        return len(rows)
+
+    async def archive_settled(self, before: dt.datetime, limit: int) -> int:
+        return await self._archive(Payment.updated_at < before, limit)
+
+    async def archive_abandoned(self, before: dt.datetime, limit: int) -> int:
+        return await self._archive(and_(Payment.status == "pending", Payment.created_at < before), limit)
@@ -0,0 +1,63 @@
+import asyncio
+import random
+import datetime as dt
+from typing import List
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import ProvisioningJob
+from app.cache import after_commit
+
+job_enqueued = asyncio.Event()
+
+class ProvisioningRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(self, user_id: int, tg_id: int, days: int) -> ProvisioningJob:
+        job = ProvisioningJob(user_id=user_id, tg_id=tg_id, days=days, status="pending", next_attempt_at=dt.datetime.utcnow())
+        self.session.add(job)
+        await self.session.flush()
+        after_commit(self.session.sync_session, job_enqueued.set)
+        return job
+
+    async def claim(self, limit: int, now: dt.datetime | None = None) -> List[ProvisioningJob]:
+        now = now or dt.datetime.utcnow()
+        due = (
+            select(ProvisioningJob.id)
+            .where(ProvisioningJob.status == "pending", ProvisioningJob.next_attempt_at <= now)
+            .order_by(ProvisioningJob.next_attempt_at)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(
+            update(ProvisioningJob)
+            .where(ProvisioningJob.id.in_(due), ProvisioningJob.status == "pending")
+            .values(status="running", attempts=ProvisioningJob.attempts + 1, updated_at=now)
+            .returning(ProvisioningJob)
+            .execution_options(synchronize_session=False)
+        )
+        return list(res.scalars())
+
+    async def complete(self, job_id: int) -> None:
+        await self.session.execute(
+            update(ProvisioningJob).where(ProvisioningJob.id == job_id).values(status="done", last_error=None)
+        )
+
+    async def retry_or_fail(self, job: ProvisioningJob, error: str) -> str:
+        if job.attempts >= settings.PROVISION_MAX_ATTEMPTS:
+            status, next_at = "failed", job.next_attempt_at
+        else:
+            delay = min(5 * 2 ** job.attempts, 600) * random.uniform(0.5, 1.0)
+            status, next_at = "pending", dt.datetime.utcnow() + dt.timedelta(seconds=delay)
+        await self.session.execute(
+            update(ProvisioningJob)
+            .where(ProvisioningJob.id == job.id)
+            .values(status=status, next_attempt_at=next_at, last_error=error[:1000])
+        )
+        return status
+
+    async def reset_running(self) -> None:
+        await self.session.execute(
+            update(ProvisioningJob).where(ProvisioningJob.status == "running").values(status="pending")
+        )
@@ -0,0 +1,41 @@
+import datetime as dt
+from typing import List, Tuple
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import dialect_insert
+from app.models import Subscription, SubscriptionReminder, User
+
+class ReminderRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def due(self, window_hours: int, now: dt.datetime, limit: int) -> List[Tuple[int, int, dt.datetime]]:
+        sent = exists().where(
+            SubscriptionReminder.subscription_id == Subscription.id,
+            SubscriptionReminder.window_hours == window_hours,
+        )
+        res = await self.session.execute(
+            select(Subscription.id, User.tg_id, Subscription.expires_at)
+            .join(User, User.id == Subscription.user_id)
+            .where(
+                Subscription.status == "active",
+                Subscription.expires_at > now,
+                Subscription.expires_at <= now + dt.timedelta(hours=window_hours),
+                ~sent,
+            )
+            .order_by(Subscription.expires_at)
+            .limit(limit)
+        )
+        return [(sid, tg_id, expires_at) for sid, tg_id, expires_at in res.all()]
+
+    async def mark_sent(self, subscription_ids: List[int], windows: List[int]) -> None:
+        if not subscription_ids:
+            return
+        now = dt.datetime.utcnow()
+        rows = [
+            {"subscription_id": sid, "window_hours": w, "sent_at": now}
+            for sid in subscription_ids
+            for w in windows
+        ]
+        stmt = dialect_insert(self.session, SubscriptionReminder).values(rows)
+        await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["subscription_id", "window_hours"]))
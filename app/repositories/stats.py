@@ -0,0 +1,122 @@
+import time
+import datetime as dt
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import dialect_insert
+from app.models import DailyStat, StatTotal, User, Subscription, Payment, PaymentArchive
+
+Deltas = Dict[Tuple[str, str], int]
+
+BACKFILL_MARK = "backfilled_at"
+
+class StatsRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _upsert(self, model, rows: List[dict], index_elements: List[str]) -> None:
+        if not rows:
+            return
+        stmt = dialect_insert(self.session, model).values(rows)
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={"value": model.value + stmt.excluded.value},
+        ))
+
+    async def add(self, daily: Deltas, totals: Deltas | None = None, day: dt.date | None = None) -> None:
+        day = day or dt.datetime.utcnow().date()
+        await self._upsert(
+            DailyStat,
+            [{"day": day, "metric": m, "dim": d, "value": v} for (m, d), v in daily.items() if v],
+            ["day", "metric", "dim"],
+        )
+        await self._upsert(
+            StatTotal,
+            [{"metric": m, "dim": d, "value": v} for (m, d), v in (totals or {}).items() if v],
+            ["metric", "dim"],
+        )
+
+    async def user_registered(self) -> None:
+        await self.add({("new_users", ""): 1}, {("users", ""): 1})
+
+    async def subscription_activated(self) -> None:
+        await self.add({("activations", ""): 1}, {("active_subs", ""): 1})
+
+    async def subscriptions_deactivated(self, count: int) -> None:
+        await self.add({}, {("active_subs", ""): -count})
+
+    async def subscriptions_expired(self, count: int) -> None:
+        await self.add({("expirations", ""): count}, {("active_subs", ""): -count})
+
+    async def payment_settled(self, provider: str, currency: str, amount: int) -> None:
+        dim = f"{provider}:{currency}"
+        await self.add({("revenue", dim): amount, ("payments", dim): 1}, {("revenue", dim): amount, ("payments", dim): 1})
+
+    async def totals(self) -> Deltas:
+        res = await self.session.execute(select(StatTotal.metric, StatTotal.dim, StatTotal.value))
+        return {(m, d): v for m, d, v in res.all()}
+
+    async def daily(self, since: dt.date) -> Dict[dt.date, Deltas]:
+        res = await self.session.execute(
+            select(DailyStat.day, DailyStat.metric, DailyStat.dim, DailyStat.value).where(DailyStat.day >= since)
+        )
+        out: Dict[dt.date, Deltas] = defaultdict(dict)
+        for day, m, d, v in res.all():
+            out[day][(m, d)] = v
+        return out
+
+    async def ensure_backfill(self) -> bool:
+        stmt = dialect_insert(self.session, StatTotal).values(metric=BACKFILL_MARK, dim="", value=int(time.time()))
+        res = await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["metric", "dim"]))
+        if not res.rowcount:
+            return False
+        res = await self.session.execute(select(StatTotal.id).where(StatTotal.metric == "users", StatTotal.dim == ""))
+        if res.first() is not None:
+            return False
+        await self.backfill(dt.datetime.utcnow())
+        return True
+
+    async def backfill(self, cutoff: dt.datetime) -> None:
+        daily: Dict[dt.date, Deltas] = defaultdict(lambda: defaultdict(int))
+        totals: Deltas = defaultdict(int)
+        q = select(User.created_at).where(User.created_at < cutoff)
+        async for (created_at,) in await self.session.stream(q):
+            daily[created_at.date()][("new_users", "")] += 1
+            totals[("users", "")] += 1
+        q = (
+            select(Subscription.user_id, Subscription.status, Subscription.created_at, Subscription.expires_at)
+            .where(Subscription.created_at < cutoff)
+            .order_by(Subscription.user_id, Subscription.created_at, Subscription.id)
+        )
+        prev = None
+        async for sub in await self.session.stream(q):
+            daily[sub.created_at.date()][("activations", "")] += 1
+            if sub.status == "active":
+                totals[("active_subs", "")] += 1
+            if prev is not None:
+                self._count_expiry(daily, prev, sub.created_at if prev.user_id == sub.user_id else None)
+            prev = sub
+        if prev is not None:
+            self._count_expiry(daily, prev, None)
+        for model in (Payment, PaymentArchive):
+            q = (
+                select(model.provider, model.currency, model.amount, model.updated_at)
+                .where(model.status == "paid", model.updated_at < cutoff)
+            )
+            async for provider, currency, amount, settled_at in await self.session.stream(q):
+                dim = f"{provider}:{currency}"
+                for bucket in (daily[settled_at.date()], totals):
+                    bucket[("revenue", dim)] += amount
+                    bucket[("payments", dim)] += 1
+        for day, deltas in daily.items():
+            await self.add(deltas, day=day)
+        await self.add({}, totals)
+
+    @staticmethod
+    def _count_expiry(daily: Dict[dt.date, Deltas], sub, replaced_at: dt.datetime | None) -> None:
+        if sub.status != "expired":
+            return
+        if replaced_at is not None and replaced_at < sub.expires_at:
+            return
+        daily[sub.expires_at.date()][("expirations", "")] += 1
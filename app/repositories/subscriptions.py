@@ -1,8 +1,11 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 import datetime as dt
-from sqlalchemy import select, update, insert
+from sqlalchemy import select, update, insert, func, exists
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Subscription
+from app.db import add_days
+from app.models import Subscription, User
+from app.cache import invalidate_user, invalidate_user_ids
+from app.repositories.stats import StatsRepository
 
 class SubscriptionRepository:
     def __init__(self, session: AsyncSession):
@@ -14,12 +17,16 @@ class SubscriptionRepository:
         )
         return res.scalar_one_or_none()
 
-    async def deactivate_all_for_user(self, user_id: int) -> None:
-        await self.session.execute(
+    async def deactivate_all_for_user(self, user_id: int) -> int:
+        res = await self.session.execute(
             update(Subscription)
             .where(Subscription.user_id == user_id, Subscription.status == "active")
             .values(status="expired")
         )
+        invalidate_user(self.session.sync_session, user_id=user_id)
+        if res.rowcount:
+            await StatsRepository(self.session).subscriptions_deactivated(res.rowcount)
+        return res.rowcount
 
     async def activate_for_user(self, user_id: int, expires_at: dt.datetime) -> Subscription:
         await self.deactivate_all_for_user(user_id)
@@ -30,4 +37,64 @@ class SubscriptionRepository:
                 expires_at=expires_at,
             ).returning(Subscription)
         )
+        invalidate_user(self.session.sync_session, user_id=user_id)
+        sub = res.scalar_one()
+        await StatsRepository(self.session).subscription_activated()
+        return sub
+
+    async def expire_due(self, now: dt.datetime, limit: int) -> List[int]:
+        due = (
+            select(Subscription.id)
+            .where(Subscription.status == "active", Subscription.expires_at <= now)
+            .order_by(Subscription.expires_at)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(
+            update(Subscription)
+            .where(Subscription.id.in_(due))
+            .values(status="expired")
+            .returning(Subscription.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = list(res.scalars())
+        invalidate_user_ids(self.session.sync_session, user_ids)
+        if user_ids:
+            await StatsRepository(self.session).subscriptions_expired(len(user_ids))
+        return user_ids
+
+    async def tg_ids_without_active(self, user_ids: List[int]) -> List[int]:
+        if not user_ids:
+            return []
+        has_active = exists().where(Subscription.user_id == User.id, Subscription.status == "active")
+        res = await self.session.execute(select(User.tg_id).where(User.id.in_(user_ids), ~has_active))
+        return list(res.scalars())
+
+    async def next_expiry(self) -> Optional[dt.datetime]:
+        res = await self.session.execute(
+            select(func.min(Subscription.expires_at)).where(Subscription.status == "active")
+        )
+        return res.scalar_one_or_none()
+
+    async def count_active(self) -> int:
+        res = await self.session.execute(select(func.count(Subscription.id)).where(Subscription.status == "active"))
         return res.scalar_one()
+
+    async def extend_active(self, days: int, after_id: int, limit: int) -> List[Tuple[int, int, dt.datetime]]:
+        batch = (
+            select(Subscription.id)
+            .where(Subscription.status == "active", Subscription.id > after_id)
+            .order_by(Subscription.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(
+            update(Subscription)
+            .where(Subscription.id.in_(batch))
+            .values(expires_at=add_days(self.session, Subscription.expires_at, days))
+            .returning(Subscription.id, Subscription.user_id, Subscription.expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        rows = [tuple(r) for r in res.all()]
+        invalidate_user_ids(self.session.sync_session, [user_id for _, user_id, _ in rows])
+        return rows
@@ -0,0 +1,30 @@
+import datetime as dt
+from typing import Dict, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import dialect_insert
+from app.models import UserTraffic
+
+class TrafficRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def store(self, panel_id: int, usage: Dict[int, Tuple[int, int]]) -> int:
+        res = await self.session.execute(
+            select(UserTraffic.tg_id, UserTraffic.up, UserTraffic.down).where(UserTraffic.panel_id == panel_id)
+        )
+        known = {tg_id: (up, down) for tg_id, up, down in res.all()}
+        now = dt.datetime.utcnow()
+        rows = [
+            {"tg_id": tg_id, "panel_id": panel_id, "up": up, "down": down, "updated_at": now}
+            for tg_id, (up, down) in usage.items()
+            if known.get(tg_id) != (up, down)
+        ]
+        for i in range(0, len(rows), 500):
+            stmt = dialect_insert(self.session, UserTraffic).values(rows[i:i + 500])
+            await self.session.execute(stmt.on_conflict_do_update(
+                index_elements=["tg_id", "panel_id"],
+                set_={"up": stmt.excluded.up, "down": stmt.excluded.down, "updated_at": stmt.excluded.updated_at},
+            ))
+        return len(rows)
+
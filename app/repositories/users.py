@@ -1,6 +1,10 @@
-from sqlalchemy import select
+from typing import List, Optional, Tuple
+from sqlalchemy import select, update, and_, func, bindparam, String, DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import User
+from app.models import User, Subscription, UserTraffic
+from app.activity import Activity, activity
+from app.cache import UserSnapshot, user_cache, invalidate_user, invalidate_user_ids
+from app.repositories.stats import StatsRepository
 import datetime as dt
 
 class UserRepository:
@@ -12,14 +16,41 @@ class UserRepository:
         user = res.scalar_one_or_none()
         if user:
             if username is not None and user.username != username:
-                user.username = username
-                await self.session.flush()
+                activity.touch(tg_id, username)
             return user
-        user = User(tg_id=tg_id, username=username, created_at=dt.datetime.utcnow())
+        now = dt.datetime.utcnow()
+        user = User(tg_id=tg_id, username=username, created_at=now, last_seen_at=now)
         self.session.add(user)
         await self.session.flush()
+        await StatsRepository(self.session).user_registered()
         return user
 
+    async def snapshot(self, tg_id: int) -> UserSnapshot | None:
+        snap = user_cache.get(tg_id)
+        if snap is not None:
+            return snap
+        up = select(func.coalesce(func.sum(UserTraffic.up), 0)).where(UserTraffic.tg_id == tg_id).scalar_subquery()
+        down = select(func.coalesce(func.sum(UserTraffic.down), 0)).where(UserTraffic.tg_id == tg_id).scalar_subquery()
+        res = await self.session.execute(
+            select(User.id, User.tos_accepted_at, User.balance, Subscription.expires_at, up.label("up"), down.label("down"))
+            .outerjoin(Subscription, and_(Subscription.user_id == User.id, Subscription.status == "active"))
+            .where(User.tg_id == tg_id)
+        )
+        row = res.first()
+        if not row:
+            return None
+        snap = UserSnapshot(
+            id=row.id,
+            tg_id=tg_id,
+            tos_accepted=row.tos_accepted_at is not None,
+            balance=row.balance,
+            sub_expires_at=row.expires_at,
+            traffic_up=int(row.up),
+            traffic_down=int(row.down),
+        )
+        user_cache.set(tg_id, snap)
+        return snap
+
     async def add_balance(self, tg_id: int, amount: int) -> User:
         res = await self.session.execute(select(User).where(User.tg_id == tg_id))
         user = res.scalar_one_or_none()
@@ -27,9 +58,82 @@ class UserRepository:
             raise ValueError("user_not_found")
         user.balance += amount
         await self.session.flush()
+        invalidate_user(self.session.sync_session, tg_id=tg_id)
         return user
 
     async def set_tos(self, user: User) -> User:
         user.tos_accepted_at = dt.datetime.utcnow()
         await self.session.flush()
+        invalidate_user(self.session.sync_session, tg_id=user.tg_id)
         return user
+
+    async def apply_activity(self, items: List[Tuple[int, Activity]]) -> None:
+        if not items:
+            return
+        users = User.__table__
+        stmt = (
+            update(users)
+            .where(users.c.tg_id == bindparam("b_tg_id"))
+            .values(
+                username=func.coalesce(bindparam("b_username", type_=String), users.c.username),
+                last_seen_at=bindparam("b_seen_at", type_=DateTime),
+            )
+        )
+        await self.session.execute(
+            stmt,
+            [{"b_tg_id": tg_id, "b_username": username, "b_seen_at": seen_at} for tg_id, (username, seen_at) in items],
+        )
+
+    @staticmethod
+    def _bulk_filter(query, only_active: bool):
+        if only_active:
+            query = query.where(User.id.in_(select(Subscription.user_id).where(Subscription.status == "active")))
+        return query
+
+    async def count(self, only_active: bool = False) -> int:
+        res = await self.session.execute(self._bulk_filter(select(func.count(User.id)), only_active))
+        return res.scalar_one()
+
+    async def credit(self, amount: int, after_id: int, limit: int, only_active: bool = False) -> List[int]:
+        batch = (
+            self._bulk_filter(select(User.id).where(User.id > after_id), only_active)
+            .order_by(User.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(
+            update(User)
+            .where(User.id.in_(batch))
+            .values(balance=User.balance + amount)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = sorted(res.scalars())
+        invalidate_user_ids(self.session.sync_session, user_ids)
+        return user_ids
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        res = await self.session.execute(select(User).where(User.id == user_id))
+        return res.scalar_one_or_none()
+
+    async def page(self, before_id: int, limit: int) -> List[User]:
+        q = select(User).order_by(User.id.desc()).limit(limit)
+        if before_id:
+            q = q.where(User.id < before_id)
+        res = await self.session.execute(q)
+        return list(res.scalars())
+
+    async def search(self, query: str, after_id: int, limit: int) -> List[User]:
+        query = query.strip().lstrip("@").lower()
+        if query.isdigit():
+            res = await self.session.execute(select(User).where(User.tg_id == int(query), User.id > after_id))
+            return list(res.scalars())
+        if not query:
+            return []
+        key = func.lower(User.username)
+        q = select(User).where(key >= query, key < query + "\uffff").order_by(key, User.id).limit(limit)
+        if after_id:
+            after_key = select(func.lower(User.username)).where(User.id == after_id).scalar_subquery()
+            q = q.where((key > after_key) | ((key == after_key) & (User.id > after_id)))
+        res = await self.session.execute(q)
+        return list(res.scalars())
@@ -1,35 +1,63 @@
 import time
-from typing import List, Tuple
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import Dict, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models import Panel
 from app.repositories.panels import PanelRepository
-from app.integrations.xui_client import XUIPanelClient, deterministic_uuid
+from app.integrations.xui_client import xui_pool, deterministic_uuid
+from app.integrations.health import panel_health
+from app.config import settings
+from app.services.placement import PlacementService
+
+log = logging.getLogger(__name__)
+
+_panel_slots: Dict[int, asyncio.Semaphore] = {}
+
+def panel_slot(panel_id: int) -> asyncio.Semaphore:
+    sem = _panel_slots.get(panel_id)
+    if sem is None:
+        sem = asyncio.Semaphore(settings.PROVISION_PANEL_CONCURRENCY)
+        _panel_slots[panel_id] = sem
+    return sem
 
 class PanelService:
     def __init__(self, panels: PanelRepository):
         self.panels = panels
+        self.placement = PlacementService(panels)
 
-    async def _clients_for_all_panels(self, uid: int, days: int) -> List[Tuple[str, str]]:
-        async_panels = await self.panels.list_active()
+    @staticmethod
+    def _by_latency(panels: List[Panel]) -> List[Panel]:
+        return sorted(panels, key=lambda p: panel_health.get(p.base_url).sort_key)
+
+    async def _clients_for_assigned_panels(self, uid: int, days: int, limit: bool = False) -> List[Tuple[str, str]]:
+        async_panels = self._by_latency(await self.placement.panels_for(uid))
         expires = int(time.time()) + days * 86400
         email = f"{uid}@bot"
         links: List[Tuple[str, str]] = []
         for p in async_panels:
+            if not panel_health.get(p.base_url).available:
+                continue
             uuid = deterministic_uuid(f"panel:{p.id}", f"user:{uid}")
-            client = XUIPanelClient(p.base_url, p.username, p.password, p.domain, verify_ssl=False)
-            vless_links = await client.provision_user_for_all_vless(email=email, uuid=uuid, expire_at_ts=expires)
-            await client.close()
+            client = xui_pool.get(p)
+            try:
+                async with panel_slot(p.id) if limit else nullcontext():
+                    vless_links = await client.provision_user_for_all_vless(email=email, uuid=uuid, expire_at_ts=expires)
+            except Exception as e:
+                log.warning("Panel %s skipped: %s", p.id, e)
+                continue
             for l in vless_links:
                 links.append((p.title, l))
         return links
 
     async def provision_user(self, uid: int, days: int) -> List[str]:
-        pairs = await self._clients_for_all_panels(uid, days)
+        pairs = await self._clients_for_assigned_panels(uid, days, limit=True)
         return [link for _, link in pairs]
 
     async def build_subscription_body(self, uid: int) -> str:
-        pairs = await self._clients_for_all_panels(uid, 1)
+        pairs = await self._clients_for_assigned_panels(uid, 1)
         uniq = []
         seen = set()
         for _, link in pairs:
@@ -37,3 +65,15 @@ class PanelService:
                 seen.add(link)
                 uniq.append(link)
         return "\n".join(uniq)
+
+    async def disable_users(self, uids: List[int], panels: List[Panel] | None = None) -> int:
+        if not uids:
+            return 0
+        emails = {f"{uid}@bot" for uid in uids}
+        disabled = 0
+        for p in panels if panels is not None else await self.panels.list_active():
+            try:
+                disabled += await xui_pool.get(p).disable_clients(emails)
+            except Exception:
+                log.exception("Failed to disable clients on panel %s", p.id)
+        return disabled
@@ -0,0 +1,86 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.models import Panel
+from app.repositories.panels import PanelRepository
+from app.integrations.health import panel_health
+
+_user_locks: Dict[int, List[Any]] = {}
+
+@asynccontextmanager
+async def user_lock(tg_id: int) -> AsyncIterator[None]:
+    entry = _user_locks.get(tg_id)
+    if entry is None:
+        entry = [asyncio.Lock(), 0]
+        _user_locks[tg_id] = entry
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            _user_locks.pop(tg_id, None)
+
+class LoadCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Optional[Tuple[float, Dict[int, int]]] = None
+
+    async def get(self, panels: PanelRepository) -> Dict[int, int]:
+        if self._value is None or time.monotonic() - self._value[0] >= self.ttl:
+            self.set(await panels.load())
+        return self._value[1]
+
+    def set(self, load: Dict[int, int]) -> None:
+        self._value = (time.monotonic(), load)
+
+panel_load = LoadCache(settings.PLACEMENT_LOAD_TTL)
+
+class PlacementService:
+    def __init__(self, panels: PanelRepository, per_user: int | None = None):
+        self.panels = panels
+        self.per_user = per_user or settings.PANELS_PER_USER
+
+    @staticmethod
+    def choose(active: List[Panel], load: Dict[int, int], n: int, exclude: Iterable[int] = ()) -> List[Panel]:
+        excluded = set(exclude)
+        candidates = [p for p in active if p.id not in excluded and panel_health.get(p.base_url).available]
+        free = [p for p in candidates if load.get(p.id, 0) < p.capacity]
+        pool = free or candidates
+        pool.sort(key=lambda p: (load.get(p.id, 0) / max(p.capacity, 1), panel_health.get(p.base_url).sort_key))
+        return pool[:max(n, 0)]
+
+    async def place(
+        self,
+        tg_id: int,
+        active: Optional[List[Panel]] = None,
+        load: Optional[Dict[int, int]] = None,
+        exclude: Iterable[int] = (),
+    ) -> List[Panel]:
+        assigned = await self.panels.assigned_to(tg_id)
+        if len(assigned) >= self.per_user:
+            return assigned
+        if active is None:
+            active = await self.panels.list_active()
+        if len(assigned) >= len(active):
+            return assigned
+        if load is None:
+            load = await panel_load.get(self.panels)
+        picks = self.choose(active, load, self.per_user - len(assigned), [p.id for p in assigned] + list(exclude))
+        await self.panels.assign(tg_id, [p.id for p in picks])
+        for p in picks:
+            load[p.id] = load.get(p.id, 0) + 1
+        return assigned + picks
+
+    async def panels_for(self, tg_id: int) -> List[Panel]:
+        async with user_lock(tg_id):
+            panels = await self.place(tg_id)
+            await self.panels.session.commit()
+        if panels and not any(panel_health.get(p.base_url).available for p in panels):
+            active = await self.panels.list_active()
+            fallback = self.choose(active, await panel_load.get(self.panels), self.per_user, [p.id for p in panels])
+            return fallback or panels
+        return panels
@@ -3,13 +3,13 @@ from typing import Tuple
 from app.config import settings
 from app.repositories.users import UserRepository
 from app.repositories.subscriptions import SubscriptionRepository
-from app.services.panels import PanelService
+from app.repositories.provisioning import ProvisioningRepository
 
 class SubscriptionService:
-    def __init__(self, users: UserRepository, subs: SubscriptionRepository, panels: PanelService):
+    def __init__(self, users: UserRepository, subs: SubscriptionRepository, jobs: ProvisioningRepository):
         self.users = users
         self.subs = subs
-        self.panels = panels
+        self.jobs = jobs
 
     async def buy_with_balance(self, tg_id: int, days: int) -> Tuple[str, dt.datetime]:
         u = await self.users.get_or_create(tg_id, None)
@@ -19,7 +19,7 @@ class SubscriptionService:
         await self.users.add_balance(tg_id, -price)
         expires = dt.datetime.utcnow() + dt.timedelta(days=days)
         await self.subs.activate_for_user(u.id, expires)
-        await self.panels.provision_user(tg_id, days)
+        await self.jobs.enqueue(u.id, tg_id, days)
         link = f"{settings.BASE_PUBLIC_URL}/webhooks/subscription/{tg_id}?token={settings.SUBSCRIPTION_SIGN_SECRET}"
         return link, expires
 
@@ -34,6 +34,6 @@ class SubscriptionService:
         await self.users.add_balance(tg_id, -price)
         expires = dt.datetime.utcnow() + dt.timedelta(days=int(t.days))
         await self.subs.activate_for_user(u.id, expires)
-        await self.panels.provision_user(tg_id, int(t.days))
+        await self.jobs.enqueue(u.id, tg_id, int(t.days))
         link = f"{settings.BASE_PUBLIC_URL}/webhooks/subscription/{tg_id}?token={settings.SUBSCRIPTION_SIGN_SECRET}"
         return link, expires
@@ -0,0 +1,80 @@
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from app.config import settings
+from app.db import engine, SessionLocal
+from app.repositories.panels import PanelRepository
+from app.repositories.tariffs import TariffRepository
+from app.integrations.xui_client import xui_pool
+
+log = logging.getLogger(__name__)
+
+REQUIRED_STEPS = ("db", "tariffs")
+
+async def ping_db() -> float:
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return time.perf_counter() - started
+
+async def _warm_db() -> Dict[str, Any]:
+    size = min(getattr(engine.pool, "size", lambda: 1)(), 5)
+    await asyncio.gather(*(ping_db() for _ in range(size)))
+    return {"connections": size}
+
+async def _warm_tariffs() -> Dict[str, Any]:
+    async with SessionLocal() as s:
+        items = await TariffRepository(s).catalog()
+    return {"count": len(items)}
+
+class Warmup:
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.panels: List[Tuple[int, str]] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None and all(self.steps.get(name, {}).get("ok") for name in REQUIRED_STEPS)
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or (self._task.done() and not self.ready):
+            self._task = asyncio.create_task(self._run(), name="warmup")
+        return self._task
+
+    async def _step(self, name: str, coro) -> None:
+        started = time.perf_counter()
+        try:
+            detail = await coro
+            self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1), **detail}
+        except Exception as e:
+            self.steps[name] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "error": f"{type(e).__name__}: {e}"}
+            log.warning("Warm-up step %s failed: %s", name, e)
+
+    async def _warm_panels(self) -> Dict[str, Any]:
+        async with SessionLocal() as s:
+            items = await PanelRepository(s).list_active()
+        self.panels = [(p.id, p.base_url) for p in items]
+        results = await asyncio.gather(
+            *(asyncio.wait_for(xui_pool.get(p).inbound_catalog(), settings.WARMUP_TIMEOUT) for p in items),
+            return_exceptions=True,
+        )
+        failed = [p.id for p, r in zip(items, results) if isinstance(r, BaseException)]
+        return {"panels": len(items), "failed": failed}
+
+    async def _run(self) -> None:
+        self.started_at = time.time()
+        self.finished_at = None
+        await asyncio.gather(
+            self._step("db", _warm_db()),
+            self._step("tariffs", _warm_tariffs()),
+            self._step("panels", self._warm_panels()),
+        )
+        self.finished_at = time.time()
+        log.info("Warm-up finished in %.2fs, ready=%s", self.finished_at - self.started_at, self.ready)
+
+warmup = Warmup()
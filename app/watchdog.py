@@ -0,0 +1,98 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.metrics import registry
+
+log = logging.getLogger(__name__)
+
+loop_lag_seconds = registry.histogram(
+    "vpn_event_loop_lag_seconds",
+    "Event loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+loop_stalls = registry.counter("vpn_event_loop_stalls_total", "Event loop stalls above the threshold")
+
+class LoopWatchdog:
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.loop_thread_id: Optional[int] = None
+        self.heartbeat = time.monotonic()
+        self.last_stall: Optional[Tuple[float, str]] = None
+        self._monitor: Optional[threading.Thread] = None
+
+    def _watch(self) -> None:
+        reported = 0.0
+        while True:
+            time.sleep(self.interval / 2)
+            beat = self.heartbeat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or beat == reported:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<no frame>"
+            self.last_stall = (time.time(), stack)
+            loop_stalls.inc()
+            log.warning("Event loop blocked for %.0f ms, current stack:\n%s", stalled * 1000, stack)
+
+    async def run(self) -> None:
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._monitor.start()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            loop_lag_seconds.observe(max(0.0, now - expected))
+            self.heartbeat = now
+
+watchdog = LoopWatchdog(settings.LOOP_LAG_INTERVAL, settings.LOOP_STALL_THRESHOLD)
+
+async def run_loop_watchdog():
+    await watchdog.run()
+
+def _sample(thread_id: int, seconds: float, interval: float) -> Tuple[Counter, Counter, int]:
+    own: Counter = Counter()
+    total: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            samples += 1
+            own[(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)] += 1
+            seen = set()
+            f = frame
+            while f is not None:
+                key = (f.f_code.co_filename, f.f_code.co_firstlineno, f.f_code.co_name)
+                if key not in seen:
+                    seen.add(key)
+                    total[key] += 1
+                f = f.f_back
+        time.sleep(interval)
+    return own, total, samples
+
+async def sample_profile(seconds: float, interval: float = 0.005, top: int = 15) -> str:
+    seconds = max(0.1, min(seconds, settings.PROFILE_MAX_SECONDS))
+    thread_id = threading.get_ident()
+    own, total, samples = await asyncio.to_thread(_sample, thread_id, seconds, interval)
+    if not samples:
+        return "no samples"
+    lines = [f"{samples} samples over {seconds:.1f}s", "", "self:"]
+    lines += [f"{n * 100 / samples:5.1f}%  {name} {_short(path)}:{line}" for (path, line, name), n in own.most_common(top)]
+    lines += ["", "inclusive:"]
+    lines += [f"{n * 100 / samples:5.1f}%  {name} {_short(path)}:{line}" for (path, line, name), n in total.most_common(top)]
+    return "\n".join(lines)
+
+def _short(path: str) -> str:
+    parts: List[str] = path.replace("\\", "/").split("/")
+    return "/".join(parts[-3:])
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
 from fastapi.responses import PlainTextResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -6,14 +6,63 @@ from app.db import get_session
 from app.models import Panel, Subscription, User
 from app.config import settings
 from app.repositories.panels import PanelRepository
+from app.repositories.users import UserRepository
 from app.services.panels import PanelService
+from app.metrics import registry, subscription_seconds
+from app.profiler import profile
+from app.watchdog import sample_profile
+from app.logging_setup import bind
+from app.cache import TTLCache
+from app.warmup import warmup, ping_db
+from app.integrations.health import panel_health
+from app.integrations.xui_client import xui_pool
+from app.ratelimit import ip_limiter, uid_limiter, debug_limiter, subscription_gate, shed_total, client_ip, retry_after_header
+import asyncio
 import datetime as dt
 import hmac
 import hashlib
+import time
+import uuid
+import logging
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+log = logging.getLogger(__name__)
+
+last_bodies = TTLCache(settings.USER_CACHE_SIZE, settings.SUB_BODY_CACHE_TTL)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    warmup.start()
+    yield
+    await xui_pool.close()
+
+app = FastAPI(lifespan=lifespan)
 router = APIRouter()
 
+@app.middleware("http")
+async def query_profile(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    started = time.perf_counter()
+    status = 500
+    with bind(request_id=request_id, path=request.url.path), profile(f"http:{request.method} {request.url.path}") as p:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            log.log(
+                logging.WARNING if status >= 500 else logging.INFO,
+                "http request",
+                extra={
+                    "event": "http_request",
+                    "method": request.method,
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "queries": p.count,
+                },
+            )
+    response.headers["x-request-id"] = request_id
+    return response
+
 def _sign(uid: str) -> str:
     return hmac.new(settings.SUBSCRIPTION_SIGN_SECRET.encode(), msg=uid.encode(), digestmod=hashlib.sha256).hexdigest()
 
@@ -21,47 +70,141 @@ def _sign(uid: str) -> str:
 async def health():
     return {"ok": True}
 
+@router.get("/ready")
+async def ready():
+    warmup.start()
+    data = {
+        "ready": warmup.ready,
+        "warmup": warmup.steps,
+        "db_ms": None,
+        "panels": {
+            str(pid): {"state": hs.state, "latency_ms": round(hs.latency_ms, 1) if hs.latency_ms is not None else None}
+            for pid, hs in ((pid, panel_health.get(url)) for pid, url in warmup.panels)
+        },
+    }
+    try:
+        data["db_ms"] = round(await asyncio.wait_for(ping_db(), settings.READY_DB_TIMEOUT) * 1000, 1)
+    except Exception as e:
+        data["ready"] = False
+        data["db_error"] = f"{type(e).__name__}: {e}"
+    return JSONResponse(data, status_code=200 if data["ready"] else 503)
+
+def _token_ok(uid: str, token: str) -> bool:
+    raw = token.encode()
+    return hmac.compare_digest(raw, _sign(uid).encode()) or hmac.compare_digest(raw, settings.SUBSCRIPTION_SIGN_SECRET.encode())
+
+def _secret_ok(token: str, secret: str) -> bool:
+    return bool(secret) and hmac.compare_digest(token.encode(), secret.encode())
+
+def _shed(uid: str, reason: str, status: int, retry_after: float) -> PlainTextResponse:
+    cached = last_bodies.get(uid)
+    if cached is not None:
+        shed_total.inc(reason, "cache")
+        body, headers = cached
+        return PlainTextResponse(body, media_type="text/plain; charset=utf-8", headers={**headers, "x-served-from-cache": "1"})
+    shed_total.inc(reason, "rejected")
+    return PlainTextResponse(
+        "Too many requests" if status == 429 else "Service busy",
+        status_code=status,
+        media_type="text/plain; charset=utf-8",
+        headers={"Retry-After": retry_after_header(retry_after)},
+    )
+
 @router.get("/subscription/{uid}")
-async def subscription(uid: str, token: str, session: AsyncSession = Depends(get_session)):
-    expected = _sign(uid)
-    if token != expected and token != settings.SUBSCRIPTION_SIGN_SECRET:
-        raise HTTPException(403)
-    ures = await session.execute(select(User).where(User.tg_id == int(uid)))
-    user = ures.scalar_one_or_none()
-    if not user:
-        raise HTTPException(404)
-    now = dt.datetime.utcnow()
-    sres = await session.execute(select(Subscription).where(Subscription.user_id == user.id, Subscription.status == "active"))
-    sub = sres.scalar_one_or_none()
-    if not sub or sub.expires_at <= now:
-        return PlainTextResponse("No active subscription", media_type="text/plain; charset=utf-8")
-    panels_repo = PanelRepository(session)
-    pservice = PanelService(panels_repo)
-    body = await pservice.build_subscription_body(int(uid))
-    if not body.strip():
-        return PlainTextResponse("No nodes available yet", media_type="text/plain; charset=utf-8")
-    return PlainTextResponse(body, media_type="text/plain; charset=utf-8")
+async def subscription(uid: str, token: str, request: Request, session: AsyncSession = Depends(get_session)):
+    started = time.perf_counter()
+    outcome = "error"
+    gated = False
+    try:
+        wait = ip_limiter.hit(client_ip(request.headers, request.client))
+        if wait:
+            outcome = "rate_limited_ip"
+            return PlainTextResponse("Too many requests", status_code=429, headers={"Retry-After": retry_after_header(wait)})
+        if not _token_ok(uid, token):
+            outcome = "forbidden"
+            raise HTTPException(403)
+        wait = uid_limiter.hit(uid)
+        if wait:
+            outcome = "rate_limited"
+            return _shed(uid, "uid", 429, wait)
+        if not subscription_gate.try_acquire():
+            outcome = "shed"
+            return _shed(uid, "concurrency", 503, 1)
+        gated = True
+        user = await UserRepository(session).snapshot(int(uid))
+        if not user:
+            outcome = "not_found"
+            raise HTTPException(404)
+        now = dt.datetime.utcnow()
+        if not user.sub_expires_at or user.sub_expires_at <= now:
+            outcome = "no_subscription"
+            last_bodies.invalidate(uid)
+            return PlainTextResponse("No active subscription", media_type="text/plain; charset=utf-8")
+        panels_repo = PanelRepository(session)
+        pservice = PanelService(panels_repo)
+        body = await pservice.build_subscription_body(int(uid))
+        await session.commit()
+        if not body.strip():
+            outcome = "no_nodes"
+            return PlainTextResponse("No nodes available yet", media_type="text/plain; charset=utf-8")
+        expire = int(user.sub_expires_at.replace(tzinfo=dt.timezone.utc).timestamp())
+        headers = {"subscription-userinfo": f"upload={user.traffic_up}; download={user.traffic_down}; total=0; expire={expire}"}
+        last_bodies.set(uid, (body, headers))
+        outcome = "ok"
+        return PlainTextResponse(body, media_type="text/plain; charset=utf-8", headers=headers)
+    finally:
+        if gated:
+            subscription_gate.release()
+        elapsed = time.perf_counter() - started
+        subscription_seconds.observe(elapsed, outcome)
+        log.info("subscription fetch", extra={"event": "subscription_fetch", "uid": uid, "outcome": outcome, "duration_ms": round(elapsed * 1000, 1)})
 
 @router.get("/subscription/debug/{uid}")
-async def subscription_debug(uid: str, token: str, session: AsyncSession = Depends(get_session)):
+async def subscription_debug(uid: str, token: str, request: Request, session: AsyncSession = Depends(get_session)):
     data = {"uid": uid, "token_ok": False, "user_found": False, "active_sub": False, "links": 0}
-    expected = _sign(uid)
-    data["token_ok"] = (token == expected) or (token == settings.SUBSCRIPTION_SIGN_SECRET)
+    wait = ip_limiter.hit(client_ip(request.headers, request.client))
+    if wait:
+        return PlainTextResponse("Too many requests", status_code=429, headers={"Retry-After": retry_after_header(wait)})
+    data["token_ok"] = _token_ok(uid, token)
     if not data["token_ok"]:
         return JSONResponse(data)
-    ures = await session.execute(select(User).where(User.tg_id == int(uid)))
-    user = ures.scalar_one_or_none()
-    data["user_found"] = bool(user)
-    if not user:
+    wait = debug_limiter.hit(uid)
+    if wait:
+        return PlainTextResponse("Too many requests", status_code=429, headers={"Retry-After": retry_after_header(wait)})
+    if not subscription_gate.try_acquire():
+        return PlainTextResponse("Service busy", status_code=503, headers={"Retry-After": "1"})
+    try:
+        ures = await session.execute(select(User).where(User.tg_id == int(uid)))
+        user = ures.scalar_one_or_none()
+        data["user_found"] = bool(user)
+        if not user:
+            return JSONResponse(data)
+        now = dt.datetime.utcnow()
+        sres = await session.execute(select(Subscription).where(Subscription.user_id == user.id, Subscription.status == "active"))
+        sub = sres.scalar_one_or_none()
+        data["active_sub"] = bool(sub and sub.expires_at > now)
+        panels_repo = PanelRepository(session)
+        pservice = PanelService(panels_repo)
+        body = await pservice.build_subscription_body(int(uid))
+        await session.commit()
+        data["links"] = len(body.splitlines()) if body else 0
         return JSONResponse(data)
-    now = dt.datetime.utcnow()
-    sres = await session.execute(select(Subscription).where(Subscription.user_id == user.id, Subscription.status == "active"))
-    sub = sres.scalar_one_or_none()
-    data["active_sub"] = bool(sub and sub.expires_at > now)
-    panels_repo = PanelRepository(session)
-    pservice = PanelService(panels_repo)
-    body = await pservice.build_subscription_body(int(uid))
-    data["links"] = len(body.splitlines()) if body else 0
-    return JSONResponse(data)
+    finally:
+        subscription_gate.release()
+
+@router.get("/admin/profile")
+async def admin_profile(token: str, seconds: float = 5.0):
+    if not _secret_ok(token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(403)
+    return PlainTextResponse(await sample_profile(seconds), media_type="text/plain; charset=utf-8")
+
+@app.get("/metrics")
+async def metrics(request: Request, token: str = ""):
+    bearer = request.headers.get("authorization", "")
+    if bearer.lower().startswith("bearer "):
+        token = bearer[7:].strip()
+    if not _secret_ok(token, settings.METRICS_TOKEN):
+        raise HTTPException(403)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 app.include_router(router, prefix="/webhooks")
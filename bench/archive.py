@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+from bench.common import percentile, print_table
+from bench.env import bench_env
+
+PROVIDERS = (("cryptobot", "TON"), ("yookassa", "RUB"))
+
+def raw_payload(n: int, provider: str, status: str, created: dt.datetime) -> str:
+    return json.dumps({
+        "invoice_id": n,
+        "hash": f"IV{n:012d}",
+        "status": status,
+        "provider": provider,
+        "amount": "399.00",
+        "description": "Пополнение баланса",
+        "pay_url": f"https://pay.example.com/invoice/IV{n:012d}",
+        "created_at": created.isoformat(),
+        "allow_comments": True,
+        "allow_anonymous": True,
+        "payload": str(n % 100_000),
+    })
+
+async def seed(payments: int, days: int, chunk: int = 20_000) -> None:
+    from sqlalchemy import insert
+    from app.db import engine, Base
+    from app.models import Payment
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = dt.datetime.utcnow()
+    rnd = random.Random(42)
+    for start in range(1, payments + 1, chunk):
+        rows = []
+        for n in range(start, min(start + chunk, payments + 1)):
+            created = now - dt.timedelta(seconds=rnd.uniform(0, days * 86400))
+            provider, currency = PROVIDERS[n % 2]
+            status = "paid" if rnd.random() < 0.6 else "pending"
+            rows.append({
+                "user_id": n % 100_000 + 1,
+                "provider": provider,
+                "external_id": f"{provider}-{n}",
+                "amount": 39900,
+                "currency": currency,
+                "status": status,
+                "raw": raw_payload(n, provider, status, created),
+                "created_at": created,
+                "updated_at": created,
+            })
+        async with engine.begin() as conn:
+            await conn.execute(insert(Payment), rows)
+
+async def measure(lookups: int, payments: int) -> Dict[str, Any]:
+    from sqlalchemy import select, func, text
+    from app.db import SessionLocal
+    from app.models import Payment, PaymentArchive
+    from app.repositories.payments import PaymentRepository
+    rnd = random.Random(7)
+    lat: List[float] = []
+    async with SessionLocal() as s:
+        repo = PaymentRepository(s)
+        for _ in range(lookups):
+            n = rnd.randint(1, payments)
+            provider = PROVIDERS[n % 2][0]
+            started = time.perf_counter()
+            await repo.by_external(provider, f"{provider}-{n}")
+            lat.append(time.perf_counter() - started)
+        since = dt.datetime.utcnow() - dt.timedelta(days=1)
+        started = time.perf_counter()
+        pending = (await s.execute(
+            select(func.count(Payment.id)).where(Payment.status == "pending", Payment.created_at >= since)
+        )).scalar_one()
+        scan = time.perf_counter() - started
+        hot = (await s.execute(select(func.count(Payment.id)))).scalar_one()
+        hot_raw = (await s.execute(select(func.coalesce(func.sum(func.length(Payment.raw)), 0)))).scalar_one()
+        archived = (await s.execute(select(func.count(PaymentArchive.id)))).scalar_one()
+        archived_raw = (await s.execute(select(func.coalesce(func.sum(func.length(PaymentArchive.raw)), 0)))).scalar_one()
+        pages = (await s.execute(text("PRAGMA page_count"))).scalar_one()
+        page_size = (await s.execute(text("PRAGMA page_size"))).scalar_one()
+    return {
+        "hot_rows": hot,
+        "archived_rows": archived,
+        "hot_raw_mb": hot_raw / 2**20,
+        "archived_raw_mb": archived_raw / 2**20,
+        "db_mb": pages * page_size / 2**20,
+        "lookup_p50_ms": percentile(lat, 0.50) * 1000,
+        "lookup_p95_ms": percentile(lat, 0.95) * 1000,
+        "pending_scan_ms": scan * 1000,
+        "pending_24h": pending,
+    }
+
+async def run(args) -> None:
+    from sqlalchemy import text
+    from app.db import engine
+    from app.jobs.archive import archive_payments
+    started = time.perf_counter()
+    await seed(args.payments, args.days)
+    print(f"seeded {args.payments} payments in {time.perf_counter() - started:.1f}s")
+    before = await measure(args.lookups, args.payments)
+    started = time.perf_counter()
+    moved = await archive_payments()
+    elapsed = time.perf_counter() - started
+    async with engine.connect() as conn:
+        await conn.execute(text("VACUUM"))
+    after = await measure(args.lookups, args.payments)
+    cols = ["phase", *before.keys()]
+    print_table([{"phase": "before", **before}, {"phase": "after", **after}], cols)
+    print(f"\narchived {moved} payments in {elapsed:.1f}s ({moved / elapsed if elapsed else 0:.0f} rows/s)")
+    await engine.dispose()
+
+def main():
+    ap = argparse.ArgumentParser(description="Seed a large payments table, run the archiver and compare hot-path lookups")
+    ap.add_argument("--payments", type=int, default=2_000_000)
+    ap.add_argument("--days", type=int, default=730, help="spread of payment ages")
+    ap.add_argument("--lookups", type=int, default=2000)
+    args = ap.parse_args()
+    workdir = tempfile.mkdtemp(prefix="vpnarchivebench")
+    os.environ.update(bench_env(os.path.join(workdir, "archive.sqlite3")))
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
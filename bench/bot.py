@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import datetime as dt
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Tuple
+from bench.common import percentile, print_table
+from bench.env import bench_env
+from bench.seed import tg_id
+
+ADMIN_ID = 1
+USER_FLOW = ["/start", "profile", "balance", "tariffs", "buy_tariff:1", "back_to_main", "topup"]
+ADMIN_FLOW = ["admin_open", "admin_tariffs", "admin_set_price:1", "price:399", "admin_list_panels", "admin_panel_view:1", "back_to_main"]
+
+current_update: ContextVar[Dict[str, int] | None] = ContextVar("current_update", default=None)
+
+def _tally(kind: str) -> None:
+    counts = current_update.get()
+    if counts is not None:
+        counts[kind] += 1
+
+def make_fake_session():
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import AnswerCallbackQuery, EditMessageText, GetChatMember, SendMessage
+    from aiogram.types import Chat, ChatMemberMember, Message, User
+
+    class FakeSession(BaseSession):
+        def __init__(self):
+            super().__init__()
+            self.calls: Dict[str, int] = defaultdict(int)
+            self.ids = itertools.count(1)
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls[type(method).__name__] += 1
+            _tally("api")
+            if isinstance(method, GetChatMember):
+                return ChatMemberMember(user=User(id=method.user_id, is_bot=False, first_name="u"), status="member")
+            if isinstance(method, (SendMessage, EditMessageText)):
+                chat_id = getattr(method, "chat_id", None) or 0
+                return Message(
+                    message_id=next(self.ids),
+                    date=dt.datetime.now(dt.timezone.utc),
+                    chat=Chat(id=int(chat_id), type="private"),
+                    text=method.text,
+                )
+            if isinstance(method, AnswerCallbackQuery):
+                return True
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            if False:
+                yield b""
+
+        async def close(self):
+            pass
+
+    return FakeSession()
+
+def build_update(update_id: int, user: int, action: str):
+    from aiogram.types import CallbackQuery, Chat, Message, Update, User
+    now = dt.datetime.now(dt.timezone.utc)
+    who = User(id=user, is_bot=False, first_name="bench", username=f"u{user}")
+    chat = Chat(id=user, type="private")
+    if action.startswith("/") or action.startswith("price:"):
+        text = action.split(":", 1)[1] if action.startswith("price:") else action
+        return Update(update_id=update_id, message=Message(message_id=update_id, date=now, chat=chat, from_user=who, text=text))
+    msg = Message(message_id=update_id, date=now, chat=chat, from_user=who, text="menu")
+    cq = CallbackQuery(id=str(update_id), from_user=who, chat_instance="bench", message=msg, data=action)
+    return Update(update_id=update_id, callback_query=cq)
+
+async def run(users: int, rounds: int, concurrency: int) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    from sqlalchemy import event
+    from app.db import engine, SessionLocal
+    from app.repositories.panels import PanelRepository
+    from app.bot import launcher
+
+    async with SessionLocal() as s:
+        await PanelRepository(s).add("bench", "http://127.0.0.1:9/p1", "admin", "admin", "bench.local")
+        await s.commit()
+
+    session = make_fake_session()
+    launcher.bot.session = session
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_):
+        _tally("db")
+
+    per_action: Dict[str, Dict[str, list]] = defaultdict(lambda: {"lat": [], "db": [], "api": []})
+    update_ids = itertools.count(1)
+
+    async def feed(user: int, action: str):
+        upd = build_update(next(update_ids), user, action)
+        key = action.split(":", 1)[0]
+        counts = defaultdict(int)
+        token = current_update.set(counts)
+        try:
+            started = time.perf_counter()
+            await launcher.dp.feed_update(launcher.bot, upd)
+            elapsed = time.perf_counter() - started
+        finally:
+            current_update.reset(token)
+        per_action[key]["lat"].append(elapsed)
+        per_action[key]["db"].append(counts["db"])
+        per_action[key]["api"].append(counts["api"])
+
+    async def user_session(user: int, flow: List[str]):
+        for action in flow:
+            await feed(user, action)
+
+    flows = []
+    for _ in range(rounds):
+        for n in random.sample(range(1, users + 1), min(concurrency, users)):
+            flows.append((tg_id(n), USER_FLOW))
+        flows.append((ADMIN_ID, ADMIN_FLOW))
+    started = time.perf_counter()
+    for i in range(0, len(flows), concurrency):
+        await asyncio.gather(*(user_session(u, f) for u, f in flows[i:i + concurrency]))
+    wall = time.perf_counter() - started
+
+    rows = []
+    total_updates = 0
+    for key, v in sorted(per_action.items()):
+        n = len(v["lat"])
+        total_updates += n
+        rows.append({
+            "update": key,
+            "count": n,
+            "mean_ms": sum(v["lat"]) / n * 1000,
+            "p95_ms": percentile(v["lat"], 0.95) * 1000,
+            "db_per_update": sum(v["db"]) / n,
+            "api_per_update": sum(v["api"]) / n,
+        })
+    summary = {
+        "updates": total_updates,
+        "updates_per_sec": total_updates / wall if wall else 0.0,
+        "wall_s": wall,
+        "db_per_update": sum(sum(v["db"]) for v in per_action.values()) / max(total_updates, 1),
+        "api_per_update": sum(sum(v["api"]) for v in per_action.values()) / max(total_updates, 1),
+    }
+    return rows, summary
+
+def main():
+    ap = argparse.ArgumentParser(description="Feed synthetic Telegram updates through the dispatcher with a recording fake Bot session")
+    ap.add_argument("--users", type=int, default=1000)
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=10)
+    args = ap.parse_args()
+    workdir = tempfile.mkdtemp(prefix="vpnbotbench")
+    os.environ.update(bench_env(os.path.join(workdir, "bot.sqlite3"), BOT_DEDUP_WINDOW="0"))
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from bench.seed import seed
+    asyncio.run(seed(args.users, 0, "http://127.0.0.1:9"))
+    rows, summary = asyncio.run(run(args.users, args.rounds, args.concurrency))
+    print_table(rows, ["update", "count", "mean_ms", "p95_ms", "db_per_update", "api_per_update"])
+    print(
+        f"\n{summary['updates']} updates, {summary['updates_per_sec']:.1f} updates/s, "
+        f"{summary['db_per_update']:.2f} DB queries/update, {summary['api_per_update']:.2f} API calls/update"
+    )
+
+if __name__ == "__main__":
+    main()
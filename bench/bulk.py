@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+from bench.common import print_table
+from bench.env import bench_env
+
+async def measure(clients: int, inbounds: int, latency_ms: float, concurrency: int) -> Dict[str, Any]:
+    import httpx
+    from app.config import settings
+    from app.integrations.xui_client import XUIPanelClient
+    from bench.fake_xui import create_app
+    settings.XUI_UPDATE_CONCURRENCY = concurrency
+    app = create_app(1, inbounds, latency_ms, 0, 0)
+    client = XUIPanelClient("http://fake/p1", "admin", "admin", "bench.local", panel_id=1)
+    client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), timeout=120.0)
+    emails = [f"{n}@bot" for n in range(1, clients + 1)]
+    await client._auth()
+    for inbound_id in range(1, inbounds + 1):
+        batch = [{"id": f"uuid-{inbound_id}-{e}", "email": e, "enable": True, "expiryTime": 0} for e in emails]
+        await client._request("POST", "/panel/api/inbounds/addClient", json={"id": inbound_id, "settings": json.dumps({"clients": batch})})
+    await client._client.post("http://fake/_reset")
+    started = time.perf_counter()
+    updated = await client.set_clients_expiry({e: 2_000_000_000 for e in emails})
+    elapsed = time.perf_counter() - started
+    calls = (await client._client.get("http://fake/_stats")).json()
+    await client.close()
+    return {
+        "clients": clients,
+        "inbounds": inbounds,
+        "concurrency": concurrency,
+        "updated": updated,
+        "panel_calls": sum(v for k, v in calls.items() if ":" not in k),
+        "seconds": elapsed,
+        "clients_per_sec": updated / elapsed if elapsed else 0.0,
+    }
+
+async def run(args) -> List[Dict[str, Any]]:
+    rows = []
+    for clients in args.clients:
+        for concurrency in args.concurrency:
+            rows.append(await measure(clients, args.inbounds, args.latency_ms, concurrency))
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Time a bulk expiry push against the stub X-UI panel")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1000, 5000])
+    ap.add_argument("--inbounds", type=int, default=2)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[4, 16])
+    args = ap.parse_args()
+    workdir = tempfile.mkdtemp(prefix="vpnbulkbench")
+    os.environ.update(bench_env(os.path.join(workdir, "bulk.sqlite3")))
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    rows = asyncio.run(run(args))
+    print_table(rows, ["clients", "inbounds", "concurrency", "updated", "panel_calls", "seconds", "clients_per_sec"])
+
+if __name__ == "__main__":
+    main()
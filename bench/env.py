@@ -0,0 +1,23 @@
+import os
+from typing import Dict
+
+SIGN_SECRET = "bench-secret"
+
+def bench_env(db_path: str, **overrides: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": "123456:bench-token-bench-token-bench-token",
+        "ADMIN_IDS": "[1]",
+        "REQUIRED_CHANNEL": "@bench",
+        "TOS_URL": "https://example.com/tos",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.abspath(db_path)}",
+        "CRYPTOBOT_TOKEN": "bench",
+        "CRYPTOBOT_PAYEE": "bench",
+        "YOOKASSA_SHOP_ID": "bench",
+        "YOOKASSA_SECRET_KEY": "bench",
+        "BASE_PUBLIC_URL": "http://127.0.0.1:8000",
+        "SUBSCRIPTION_SIGN_SECRET": SIGN_SECRET,
+        "PYTHONPATH": os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env.get("PYTHONPATH")])),
+    })
+    env.update({k: str(v) for k, v in overrides.items()})
+    return env
@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from typing import Any, Dict, List
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+class FakePanel:
+    def __init__(self, inbounds: int, base_port: int = 20000):
+        self.inbounds: List[Dict[str, Any]] = []
+        for i in range(inbounds):
+            self.inbounds.append({
+                "id": i + 1,
+                "protocol": "vless",
+                "port": base_port + i,
+                "remark": f"ib{i + 1}",
+                "enable": True,
+                "streamSettings": json.dumps({"network": "tcp", "security": "reality", "realitySettings": {"serverNames": ["example.com"]}}),
+                "clients": {},
+            })
+
+    def by_id(self, inbound_id: int) -> Dict[str, Any] | None:
+        for ib in self.inbounds:
+            if ib["id"] == inbound_id:
+                return ib
+        return None
+
+    def listing(self) -> List[Dict[str, Any]]:
+        out = []
+        for ib in self.inbounds:
+            clients = list(ib["clients"].values())
+            out.append({
+                "id": ib["id"],
+                "protocol": ib["protocol"],
+                "port": ib["port"],
+                "remark": ib["remark"],
+                "enable": ib["enable"],
+                "streamSettings": ib["streamSettings"],
+                "settings": json.dumps({"clients": clients, "decryption": "none"}),
+                "clientStats": [
+                    {"email": c["email"], "up": c.get("_up", 0), "down": c.get("_down", 0), "enable": c["enable"]}
+                    for c in clients
+                ],
+            })
+        return out
+
+def create_app(panels: int, inbounds: int, latency_ms: float, jitter_ms: float, fail_rate: float) -> FastAPI:
+    app = FastAPI()
+    state = {name: FakePanel(inbounds) for name in (f"p{i}" for i in range(1, panels + 1))}
+    calls: Counter = Counter()
+
+    async def _simulate(panel: str, op: str):
+        calls[op] += 1
+        calls[f"{panel}:{op}"] += 1
+        delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if fail_rate and random.random() < fail_rate:
+            return JSONResponse({"success": False, "msg": "injected failure"}, status_code=503)
+        return None
+
+    def _panel(name: str) -> FakePanel:
+        p = state.get(name)
+        if p is None:
+            p = FakePanel(inbounds)
+            state[name] = p
+        return p
+
+    @app.post("/{panel}/login")
+    async def login(panel: str):
+        failed = await _simulate(panel, "login")
+        return failed or PlainTextResponse("<html>xui dashboard</html>")
+
+    @app.post("/{panel}/panel/api/login")
+    async def api_login(panel: str):
+        failed = await _simulate(panel, "login")
+        return failed or JSONResponse({"success": True})
+
+    @app.get("/{panel}/panel/api/inbounds/list")
+    async def list_inbounds(panel: str):
+        failed = await _simulate(panel, "list_inbounds")
+        return failed or JSONResponse({"success": True, "obj": _panel(panel).listing()})
+
+    async def _upsert(panel: str, op: str, request: Request):
+        failed = await _simulate(panel, op)
+        if failed:
+            return failed
+        body = await request.json()
+        ib = _panel(panel).by_id(int(body.get("id") or 0))
+        if ib is None:
+            return JSONResponse({"success": False, "msg": "inbound not found"})
+        for c in json.loads(body.get("settings") or "{}").get("clients") or []:
+            prev = ib["clients"].get(c["email"], {})
+            c["_up"] = prev.get("_up", 0) + random.randint(0, 10_000_000)
+            c["_down"] = prev.get("_down", 0) + random.randint(0, 100_000_000)
+            ib["clients"][c["email"]] = c
+        return JSONResponse({"success": True})
+
+    @app.post("/{panel}/panel/api/inbounds/addClient")
+    async def add_client(panel: str, request: Request):
+        return await _upsert(panel, "addClient", request)
+
+    @app.post("/{panel}/panel/api/inbounds/updateClient/{client_id}")
+    async def update_client(panel: str, client_id: str, request: Request):
+        return await _upsert(panel, "updateClient", request)
+
+    @app.get("/_stats")
+    async def stats():
+        return JSONResponse(dict(calls))
+
+    @app.post("/_reset")
+    async def reset():
+        calls.clear()
+        return JSONResponse({"ok": True})
+
+    return app
+
+def main():
+    ap = argparse.ArgumentParser(description="Stub X-UI server; panel N is served under /pN")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18080)
+    ap.add_argument("--panels", type=int, default=3)
+    ap.add_argument("--inbounds", type=int, default=2, help="VLESS inbounds per panel")
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--jitter-ms", type=float, default=5.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of calls answered with 503")
+    args = ap.parse_args()
+    app = create_app(args.panels, args.inbounds, args.latency_ms, args.jitter_ms, args.fail_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
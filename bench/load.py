@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+import httpx
+from bench.common import free_port, percentile, print_table, spawn, stop, wait_http
+from bench.env import SIGN_SECRET, bench_env
+from bench.seed import tg_id
+
+def sign(uid: str) -> str:
+    return hmac.new(SIGN_SECRET.encode(), msg=uid.encode(), digestmod=hashlib.sha256).hexdigest()
+
+async def drive(app_url: str, users: int, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(tg_id(random.randint(1, users)))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while True:
+            try:
+                uid = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                r = await client.get(f"{app_url}/webhooks/subscription/{uid}", params={"token": sign(str(uid))})
+                if r.status_code != 200 or not r.text.startswith("vless://"):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rps": requests / elapsed if elapsed else 0.0,
+    }
+
+def run_case(args, panels: int, xui_url: str, workdir: str) -> Dict[str, float]:
+    db = os.path.join(workdir, f"bench_{panels}.sqlite3")
+    limits_off = {"SUB_BURST_PER_IP": "0", "SUB_BURST_PER_UID": "0", "SUB_MAX_CONCURRENCY": "100000"}
+    env = bench_env(db, **{**limits_off, **dict(kv.split("=", 1) for kv in args.set)})
+    subprocess.run([sys.executable, "-m", "bench.seed", "--users", str(args.users), "--panels", str(panels), "--xui-url", xui_url], env=env, cwd=workdir, check=True)
+    port = free_port()
+    app = spawn(["-m", "uvicorn", "app.webhooks:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"], env, workdir)
+    try:
+        app_url = f"http://127.0.0.1:{port}"
+        wait_http(f"{app_url}/webhooks/health")
+        if args.warmup:
+            asyncio.run(drive(app_url, args.users, args.warmup, args.concurrency))
+        httpx.post(f"{xui_url}/_reset")
+        result = asyncio.run(drive(app_url, args.users, args.requests, args.concurrency))
+        calls = httpx.get(f"{xui_url}/_stats").json()
+    finally:
+        stop(app)
+    total_calls = sum(v for k, v in calls.items() if ":" not in k)
+    result["panels"] = panels
+    result["panel_calls_per_req"] = total_calls / max(result["requests"], 1)
+    for op in ("login", "list_inbounds", "addClient", "updateClient"):
+        result[op] = calls.get(op, 0)
+    return result
+
+def main():
+    ap = argparse.ArgumentParser(description="Load the subscription endpoint against a stub X-UI server")
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--panel-counts", default="1,3,5")
+    ap.add_argument("--inbounds", type=int, default=2)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--warmup", type=int, default=0)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--jitter-ms", type=float, default=5.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="extra Settings override for the app")
+    ap.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = ap.parse_args()
+    counts = [int(x) for x in args.panel_counts.split(",") if x.strip()]
+    with tempfile.TemporaryDirectory(prefix="vpnbench") as workdir:
+        xui_port = free_port()
+        xui = spawn([
+            "-m", "bench.fake_xui", "--port", str(xui_port), "--panels", str(max(counts)),
+            "--inbounds", str(args.inbounds), "--latency-ms", str(args.latency_ms),
+            "--jitter-ms", str(args.jitter_ms), "--fail-rate", str(args.fail_rate),
+        ], bench_env(os.path.join(workdir, "unused.sqlite3")), workdir)
+        try:
+            xui_url = f"http://127.0.0.1:{xui_port}"
+            wait_http(f"{xui_url}/_stats")
+            rows = [run_case(args, n, xui_url, workdir) for n in counts]
+        finally:
+            stop(xui)
+    if args.json:
+        for r in rows:
+            print(json.dumps(r))
+        return
+    print_table(rows, ["panels", "requests", "errors", "p50_ms", "p95_ms", "p99_ms", "rps", "panel_calls_per_req", "login", "list_inbounds", "addClient", "updateClient"])
+
+if __name__ == "__main__":
+    main()
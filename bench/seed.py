@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import datetime as dt
+import time
+from sqlalchemy import insert
+
+async def seed(users: int, panels: int, xui_url: str, chunk: int = 5000) -> None:
+    from app.db import engine, Base
+    from app.models import User, Subscription, Panel, Tariff
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = dt.datetime.utcnow()
+    expires = now + dt.timedelta(days=30)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Tariff), [
+            {"title": "30 дней", "days": 30, "price_rub": 399, "active": True, "created_at": now},
+            {"title": "90 дней", "days": 90, "price_rub": 999, "active": True, "created_at": now},
+        ])
+        if panels:
+            await conn.execute(insert(Panel), [
+                {
+                    "title": f"bench-{i}",
+                    "base_url": f"{xui_url.rstrip('/')}/p{i}",
+                    "username": "admin",
+                    "password": "admin",
+                    "domain": f"p{i}.bench.local",
+                    "active": True,
+                    "capacity": users + 1,
+                    "created_at": now,
+                }
+                for i in range(1, panels + 1)
+            ])
+        for start in range(0, users, chunk):
+            ids = range(start + 1, min(start + chunk, users) + 1)
+            await conn.execute(insert(User), [
+                {"id": i, "tg_id": 1_000_000 + i, "username": f"u{i}", "is_active": True, "tos_accepted_at": now, "balance": 100_000, "created_at": now}
+                for i in ids
+            ])
+            await conn.execute(insert(Subscription), [
+                {"user_id": i, "status": "active", "expires_at": expires, "created_at": now}
+                for i in ids
+            ])
+    await engine.dispose()
+
+def tg_id(n: int) -> int:
+    return 1_000_000 + n
+
+def main():
+    ap = argparse.ArgumentParser(description="Create a seeded SQLite database for benchmarks (settings come from the environment, see bench/env.py)")
+    ap.add_argument("--users", type=int, default=10_000)
+    ap.add_argument("--panels", type=int, default=3)
+    ap.add_argument("--xui-url", default="http://127.0.0.1:18080")
+    args = ap.parse_args()
+    started = time.perf_counter()
+    asyncio.run(seed(args.users, args.panels, args.xui_url))
+    print(f"seeded {args.users} users, {args.panels} panels in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
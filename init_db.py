@@ -1,14 +1,33 @@
 import asyncio
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
 from app.config import settings
 from app.db import engine, Base, SessionLocal
 import app.models
 from app.repositories.tariffs import TariffRepository
+from app.repositories.stats import StatsRepository
+
+COLUMNS = [
+    ("panels", "capacity", "INTEGER NOT NULL DEFAULT 1000"),
+    ("users", "last_seen_at", "TIMESTAMP"),
+]
+
+def upgrade(conn) -> None:
+    insp = inspect(conn)
+    for table, column, ddl in COLUMNS:
+        if column not in {c["name"] for c in insp.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            conn.execute(CreateIndex(index, if_not_exists=True))
 
 async def main():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
     async with SessionLocal() as s:
         await TariffRepository(s).ensure_seed()
+        await StatsRepository(s).ensure_backfill()
         await s.commit()
     print("OK:", settings.DATABASE_URL)
 
@@ -2,26 +2,47 @@ import asyncio
 import logging
 import uvicorn
 from uvicorn import Config, Server
+from app.logging_setup import setup_logging
 from app.webhooks import app
 from app.bot.launcher import run_bot
+from app.jobs.expiry import run_expiry_scheduler
+from app.jobs.reminders import run_reminders
+from app.jobs.health import run_panel_prober
+from app.jobs.placement import run_placement_rebalancer
+from app.jobs.provisioning import run_provisioning_workers
+from app.jobs.traffic import run_traffic_collector
+from app.jobs.activity import run_activity_flusher
+from app.jobs.archive import run_payment_archiver
+from app.watchdog import run_loop_watchdog
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+setup_logging()
 
 async def run_web():
-    config = Config(app=app, host="0.0.0.0", port=8000, loop="asyncio", lifespan="on")
+    config = Config(app=app, host="0.0.0.0", port=8000, loop="asyncio", lifespan="on", log_config=None)
     server = Server(config)
     await server.serve()
 
 async def main():
     bot_task = asyncio.create_task(run_bot(), name="bot")
     api_task = asyncio.create_task(run_web(), name="web")
-    done, pending = await asyncio.wait({bot_task, api_task}, return_when=asyncio.FIRST_EXCEPTION)
+    expiry_task = asyncio.create_task(run_expiry_scheduler(), name="expiry")
+    reminders_task = asyncio.create_task(run_reminders(), name="reminders")
+    prober_task = asyncio.create_task(run_panel_prober(), name="panel_prober")
+    placement_task = asyncio.create_task(run_placement_rebalancer(), name="placement")
+    provisioning_task = asyncio.create_task(run_provisioning_workers(), name="provisioning")
+    traffic_task = asyncio.create_task(run_traffic_collector(), name="traffic")
+    watchdog_task = asyncio.create_task(run_loop_watchdog(), name="watchdog")
+    activity_task = asyncio.create_task(run_activity_flusher(), name="activity")
+    archive_task = asyncio.create_task(run_payment_archiver(), name="payment_archiver")
+    tasks = {bot_task, api_task, expiry_task, reminders_task, prober_task, placement_task, provisioning_task, traffic_task, watchdog_task, activity_task, archive_task}
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
     for t in done:
         exc = t.exception()
         if exc:
             logging.exception("Task failed", exc_info=exc)
     for t in pending:
         t.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
     if any(t.exception() for t in done):
         raise SystemExit(1)
 
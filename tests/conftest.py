@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.env import bench_env
+
+_workdir = tempfile.mkdtemp(prefix="vpntest")
+os.environ.update(bench_env(os.path.join(_workdir, "test.sqlite3"), ADMIN_API_TOKEN="admin-token", METRICS_TOKEN="metrics-token"))
+os.chdir(_workdir)
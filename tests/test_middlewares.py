@@ -0,0 +1,58 @@
+import asyncio
+import datetime as dt
+import logging
+import pytest
+from aiogram.types import CallbackQuery, Chat, Message, User
+from app.bot.middlewares import MetricsMiddleware, UserSerializationMiddleware, handler_name
+
+USER = User(id=5, is_bot=False, first_name="u")
+
+class Tap(CallbackQuery):
+    async def answer(self, *args, **kwargs) -> bool:
+        return True
+
+def _tap(data: str) -> CallbackQuery:
+    return Tap(id="1", from_user=USER, chat_instance="c", data=data)
+
+async def _scenario():
+    mw = UserSerializationMiddleware(window=0.2)
+    calls = []
+    async def handler(event, data):
+        calls.append(event.data)
+        await asyncio.sleep(0.3)
+    async def tap(data: str, delay: float):
+        await asyncio.sleep(delay)
+        await mw(handler, _tap(data), {"event_from_user": USER})
+    await asyncio.gather(tap("buy", 0), tap("buy", 0.25), tap("menu", 0.1))
+    assert calls == ["buy", "menu"]
+    await tap("buy", 0)
+    await tap("buy", 0.1)
+    await tap("buy", 0.25)
+    return calls
+
+def test_repeated_taps_dropped_while_in_flight_and_within_window():
+    assert asyncio.run(_scenario()) == ["buy", "menu", "buy", "buy"]
+
+def _text(text: str) -> Message:
+    return Message(message_id=1, date=dt.datetime.now(dt.timezone.utc), chat=Chat(id=5, type="private"), from_user=USER, text=text)
+
+def test_handler_name_bounds_command_labels():
+    commands = ("/start", "/prof")
+    assert handler_name(_text("/start ref"), commands) == "/start"
+    assert handler_name(_text("/prof@vpnbot 5"), commands) == "/prof"
+    assert handler_name(_text("/random_junk_123"), commands) == "unknown_command"
+    assert handler_name(_text("hello"), commands) == "message"
+
+def test_metrics_middleware_logs_one_completion_record(caplog):
+    mw = MetricsMiddleware(commands=("/start",))
+    async def ok(event, data):
+        return "done"
+    async def boom(event, data):
+        raise RuntimeError("boom")
+    with caplog.at_level(logging.INFO, logger="app.bot.middlewares"):
+        assert asyncio.run(mw(ok, _text("/start"), {"event_from_user": USER})) == "done"
+        with pytest.raises(RuntimeError):
+            asyncio.run(mw(boom, _text("/start"), {"event_from_user": USER}))
+    records = [r for r in caplog.records if getattr(r, "event", None) == "bot_update"]
+    assert [(r.outcome, r.levelno) for r in records] == [("ok", logging.INFO), ("error", logging.WARNING)]
+    assert all(r.duration_ms >= 0 and r.queries == 0 for r in records)
@@ -0,0 +1,72 @@
+import asyncio
+import datetime as dt
+from app.db import engine, Base, SessionLocal
+from app.models import Panel, PanelAssignment, Subscription, User
+from app.repositories.panels import PanelRepository
+
+async def _reset(panels: int, users: int, active: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = dt.datetime.utcnow()
+    async with SessionLocal() as s:
+        for i in range(1, panels + 1):
+            s.add(Panel(id=i, title=f"p{i}", base_url=f"http://p{i}", username="u", password="p", domain="d", capacity=10))
+        for i in range(1, users + 1):
+            s.add(User(id=i, tg_id=1000 + i))
+            status = "active" if i <= active else "expired"
+            s.add(Subscription(user_id=i, status=status, expires_at=now + dt.timedelta(days=1 if i <= active else -1)))
+        await s.commit()
+
+async def _load_and_shed():
+    await _reset(panels=1, users=6, active=2)
+    async with SessionLocal() as s:
+        for i in range(1, 7):
+            s.add(PanelAssignment(user_id=i, panel_id=1))
+        await s.commit()
+        repo = PanelRepository(s)
+        return await repo.load(), await repo.shed(1, 6)
+
+def test_load_and_shed_ignore_expired_users():
+    load, shed = asyncio.run(_load_and_shed())
+    assert load == {1: 2}
+    assert sorted(shed) == [1001, 1002]
+
+async def _rebalance_twice():
+    from app.jobs.placement import rebalance
+    await _reset(panels=1, users=3, active=3)
+    first = await rebalance()
+    second = await rebalance()
+    async with SessionLocal() as s:
+        under = await PanelRepository(s).under_assigned(1, 100)
+    return first, second, under
+
+def test_rebalance_settles_with_fewer_panels_than_per_user():
+    first, second, under = asyncio.run(_rebalance_twice())
+    assert first == 3
+    assert second == 0
+    assert under == []
+
+async def _failover():
+    from sqlalchemy import select
+    from app.integrations.health import panel_health, PanelHealth
+    from app.services.placement import PlacementService
+    await _reset(panels=3, users=1, active=1)
+    async with SessionLocal() as s:
+        s.add_all([PanelAssignment(user_id=1, panel_id=1), PanelAssignment(user_id=1, panel_id=2)])
+        await s.commit()
+    saved = {url: panel_health.get(url) for url in ("http://p1", "http://p2")}
+    try:
+        for url in saved:
+            panel_health._items[url] = PanelHealth(state="open", opened_at=float("inf"))
+        async with SessionLocal() as s:
+            picked = [p.id for p in await PlacementService(PanelRepository(s), per_user=2).panels_for(1001)]
+            kept = sorted((await s.execute(select(PanelAssignment.panel_id))).scalars())
+    finally:
+        panel_health._items.update(saved)
+    return picked, kept
+
+def test_fetch_fails_over_when_assigned_panels_are_down():
+    picked, kept = asyncio.run(_failover())
+    assert picked == [3]
+    assert kept == [1, 2]
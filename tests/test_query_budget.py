@@ -0,0 +1,34 @@
+import asyncio
+import datetime as dt
+from starlette.requests import Request
+from app.db import engine, Base, SessionLocal
+from app.cache import user_cache
+from app.models import Subscription, User
+from app.profiler import assert_max_queries
+from app.repositories.users import UserRepository
+from app.webhooks import _sign, subscription
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "client": ("10.0.0.1", 1000)})
+
+async def _scenario():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as s:
+        user = User(tg_id=88)
+        s.add(user)
+        await s.flush()
+        s.add(Subscription(user_id=user.id, status="active", expires_at=dt.datetime.utcnow() + dt.timedelta(days=30)))
+        await s.commit()
+    user_cache.invalidate(88)
+    async with SessionLocal() as s:
+        await UserRepository(s).snapshot(88)
+    async with SessionLocal() as s:
+        with assert_max_queries(0, "snapshot:warm"):
+            assert await UserRepository(s).snapshot(88) is not None
+        with assert_max_queries(2, "subscription:warm"):
+            return await subscription("88", _sign("88"), _request(), s)
+
+def test_warm_subscription_stays_within_query_budget():
+    assert asyncio.run(_scenario()).status_code == 200
@@ -0,0 +1,44 @@
+import asyncio
+import datetime as dt
+from app.db import engine, Base, SessionLocal
+from app.models import User, Subscription, SubscriptionReminder
+from app.repositories.reminders import ReminderRepository
+from sqlalchemy import select
+
+WINDOWS = [24, 72]
+
+async def _tick(now: dt.datetime) -> list[int]:
+    sent = []
+    for window in WINDOWS:
+        async with SessionLocal() as s:
+            repo = ReminderRepository(s)
+            batch = await repo.due(window, now, 100)
+            await repo.mark_sent([sid for sid, _, _ in batch], [w for w in WINDOWS if w >= window])
+            await s.commit()
+        sent.extend(window for _ in batch)
+    return sent
+
+async def _scenario():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = dt.datetime.utcnow()
+    async with SessionLocal() as s:
+        user = User(tg_id=42)
+        s.add(user)
+        await s.flush()
+        s.add(Subscription(user_id=user.id, status="active", expires_at=now + dt.timedelta(hours=60)))
+        await s.commit()
+    first = await _tick(now)
+    second = await _tick(now + dt.timedelta(hours=40))
+    third = await _tick(now + dt.timedelta(hours=41))
+    async with SessionLocal() as s:
+        windows = sorted((await s.execute(select(SubscriptionReminder.window_hours))).scalars())
+    return first, second, third, windows
+
+def test_72h_then_24h_reminder():
+    first, second, third, windows = asyncio.run(_scenario())
+    assert first == [72]
+    assert second == [24]
+    assert third == []
+    assert windows == [24, 72]
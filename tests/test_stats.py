@@ -0,0 +1,56 @@
+import asyncio
+import datetime as dt
+from sqlalchemy import delete
+from app.db import engine, Base, SessionLocal
+from app.models import DailyStat, StatTotal
+from app.repositories.payments import PaymentRepository
+from app.repositories.stats import StatsRepository, BACKFILL_MARK
+from app.repositories.subscriptions import SubscriptionRepository
+from app.repositories.users import UserRepository
+
+async def _snapshot(repo: StatsRepository):
+    totals = {k: v for k, v in (await repo.totals()).items() if k[0] != BACKFILL_MARK and v}
+    daily = {day: {k: v for k, v in d.items() if v} for day, d in (await repo.daily(dt.date(2000, 1, 1))).items()}
+    return totals, daily
+
+async def _scenario():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = dt.datetime.utcnow()
+    async with SessionLocal() as s:
+        users = UserRepository(s)
+        subs = SubscriptionRepository(s)
+        expired = await users.get_or_create(101, None)
+        renewed = await users.get_or_create(102, None)
+        await users.get_or_create(103, None)
+        await subs.activate_for_user(expired.id, now - dt.timedelta(seconds=1))
+        await subs.activate_for_user(renewed.id, now + dt.timedelta(days=3))
+        await subs.activate_for_user(renewed.id, now + dt.timedelta(days=30))
+        payments = PaymentRepository(s)
+        await payments.create(renewed.id, "cryptobot", "inv-1", 39900, "TON")
+        await payments.create(renewed.id, "cryptobot", "inv-2", 39900, "TON")
+        await s.commit()
+        assert await payments.mark_paid("cryptobot", "inv-1") is not None
+        assert await payments.mark_paid("cryptobot", "inv-1") is None
+        assert await subs.expire_due(dt.datetime.utcnow(), 100) == [expired.id]
+        await s.commit()
+        incremental = await _snapshot(StatsRepository(s))
+        await s.execute(delete(DailyStat))
+        await s.execute(delete(StatTotal))
+        await s.commit()
+        await asyncio.sleep(0.01)
+        assert await StatsRepository(s).ensure_backfill() is True
+        await s.commit()
+        assert await StatsRepository(s).ensure_backfill() is False
+        backfilled = await _snapshot(StatsRepository(s))
+    return incremental, backfilled
+
+def test_backfill_matches_incremental_counters():
+    incremental, backfilled = asyncio.run(_scenario())
+    totals, daily = incremental
+    assert totals[("users", "")] == 3
+    assert totals[("active_subs", "")] == 1
+    assert totals[("revenue", "cryptobot:TON")] == 39900
+    assert sum(d.get(("expirations", ""), 0) for d in daily.values()) == 1
+    assert backfilled == incremental
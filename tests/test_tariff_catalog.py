@@ -0,0 +1,13 @@
+from app.cache import TariffCatalog, TariffItem
+
+def _titles(items):
+    return tuple(t.title for t in items)
+
+def test_markup_is_built_from_catalog_items_not_stale_caller_items():
+    catalog = TariffCatalog()
+    stale = [TariffItem(1, "old", 30, 100)]
+    catalog.invalidate()
+    assert catalog.markup("buy", stale, _titles) == ("old",)
+    catalog.load([TariffItem(1, "new", 30, 150)], catalog.version)
+    assert catalog.markup("buy", stale, _titles) == ("new",)
+    assert catalog.markup("buy", [], _titles) == ("new",)
@@ -0,0 +1,23 @@
+import asyncio
+from app.db import engine, Base, SessionLocal
+from app.cache import user_cache
+from app.models import User
+from app.bot.launcher import user_snapshot
+
+async def _scenario():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as s:
+        s.add(User(tg_id=77))
+        await s.commit()
+    user_cache.invalidate(77)
+    hits, misses = user_cache.hits, user_cache.misses
+    first = await user_snapshot(77)
+    second = await user_snapshot(77)
+    return first, second, user_cache.hits - hits, user_cache.misses - misses
+
+def test_cold_snapshot_counts_one_miss():
+    first, second, hits, misses = asyncio.run(_scenario())
+    assert first is not None and second is first
+    assert (hits, misses) == (1, 1)
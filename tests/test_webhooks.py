@@ -0,0 +1,23 @@
+import logging
+from fastapi.testclient import TestClient
+from app.webhooks import app
+
+client = TestClient(app)
+
+def test_non_ascii_subscription_token_is_rejected():
+    assert client.get("/webhooks/subscription/5", params={"token": "токен"}).status_code == 403
+    assert client.get("/webhooks/subscription/debug/5", params={"token": "токен"}).json()["token_ok"] is False
+
+def test_non_ascii_admin_token_is_rejected():
+    assert client.get("/webhooks/admin/profile", params={"token": "токен"}).status_code == 403
+    assert client.get("/metrics", params={"token": "токен"}).status_code == 403
+
+def test_metrics_accepts_bearer_token():
+    assert client.get("/metrics", headers={"Authorization": "Bearer metrics-token"}).status_code == 200
+
+def test_http_middleware_logs_completion(caplog):
+    with caplog.at_level(logging.INFO, logger="app.webhooks"):
+        client.get("/webhooks/admin/profile", params={"token": "токен"})
+    records = [r for r in caplog.records if getattr(r, "event", None) == "http_request"]
+    assert [(r.method, r.status) for r in records] == [("GET", 403)]
+    assert records[0].duration_ms >= 0
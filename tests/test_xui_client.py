@@ -0,0 +1,39 @@
+import asyncio
+import json
+import httpx
+from bench.fake_xui import create_app
+from app.integrations.xui_client import XUIPanelClient
+
+def _client(app) -> XUIPanelClient:
+    c = XUIPanelClient("http://fake/p1", "u", "p", "example.com")
+    c._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return c
+
+async def _clients(c: XUIPanelClient) -> dict:
+    out = {}
+    for ib in await c.list_inbounds():
+        for client in json.loads(ib["settings"])["clients"]:
+            out[(ib["id"], client["email"])] = client
+    return out
+
+async def _scenario():
+    app = create_app(1, 2, 5, 0, 0)
+    c = _client(app)
+    await c.provision_user_for_all_vless("1@bot", "uuid-1", 2_000_000_000)
+    before = await _clients(c)
+    extended, _ = await asyncio.gather(
+        c.set_clients_expiry({"1@bot": 2_100_000_000}),
+        c.provision_user_for_all_vless("2@bot", "uuid-2", 2_000_000_000),
+    )
+    after = await _clients(c)
+    await c.close()
+    return extended, before, after
+
+def test_bulk_expiry_keeps_concurrent_clients_and_traffic():
+    extended, before, after = asyncio.run(_scenario())
+    assert extended == 2
+    assert sorted(after) == [(1, "1@bot"), (1, "2@bot"), (2, "1@bot"), (2, "2@bot")]
+    for inbound_id in (1, 2):
+        client = after[(inbound_id, "1@bot")]
+        assert client["expiryTime"] == 2_100_000_000 * 1000
+        assert client["_up"] >= before[(inbound_id, "1@bot")]["_up"]